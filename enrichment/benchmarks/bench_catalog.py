@@ -0,0 +1,56 @@
+"""
+Build a law catalog artifact of synthetic revisions and report the build time and the load time.
+- run: python benchmarks/bench_catalog.py [entries]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hyperlink.catalog import Catalog, CatalogHandle, DocMeta, build_catalog  # noqa: E402
+
+REVISIONS_PER_LAW = 4
+
+
+def docs(count: int):
+    for i in range(count // REVISIONS_PER_LAW):
+        short_name = f"第{i}号法"
+        for year in range(REVISIONS_PER_LAW):
+            yield DocMeta(f"中华人民共和国{short_name}({2000 + year * 5}修正)", short_name, 2000 + year * 5)
+
+
+def main(count: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.bin")
+        start = time.perf_counter()
+        build_catalog(path, docs(count))
+        print(f"build: {count} entries, {time.perf_counter() - start:.1f} s, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        start = time.perf_counter()
+        catalog = Catalog(path)
+        print(f"load: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        rnd = random.Random(0)
+        names = [f"第{rnd.randrange(count // REVISIONS_PER_LAW)}号法" for _ in range(10_000)]
+        start = time.perf_counter()
+        for name in names:
+            catalog.find(name, 2012)
+        print(f"find: {(time.perf_counter() - start) / len(names) * 1e6:.1f} us per lookup")
+
+        start = time.perf_counter()
+        list(catalog.scan("依照《中华人民共和国第42号法》第十条。"))
+        print(f"automaton: first scan {time.perf_counter() - start:.2f} s")
+
+        handle = CatalogHandle(path, check_interval=0)
+        build_catalog(path, docs(count // 10))
+        start = time.perf_counter()
+        handle.reload()
+        print(f"hot reload: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,75 @@
+"""
+Build a citation index of synthetic citations and measure the lookup latency.
+- run: python benchmarks/bench_citation_index.py [citations] [segments]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hyperlink.anchor_extractor import AnchorType  # noqa: E402
+from hyperlink.citation_index import Citation, CitationIndex  # noqa: E402
+
+LAWS = 5_000
+ARTICLES = 200
+
+
+def citations(count: int, seed: int):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        yield Citation(
+            AnchorType.TITLE,
+            f"法律{rnd.randrange(LAWS)}",
+            f"第{rnd.randrange(ARTICLES)}条",
+            rnd.randrange(count // 10 or 1),
+            start := rnd.randrange(100_000),
+            start + 12,
+        )
+
+
+def main(count: int, segments: int):
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        with CitationIndex(directory) as index:
+            for seed in range(segments):
+                index.append(citations(count // segments, seed))
+        build = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(directory, x)) for x in os.listdir(directory))
+        print(f"build: {count} citations in {segments} segments, {build:.1f} s, {size / 1024 / 1024:.1f} MB")
+
+        with CitationIndex(directory) as index:
+            rnd = random.Random(-1)
+            queries = [(f"法律{rnd.randrange(LAWS)}", f"第{rnd.randrange(ARTICLES)}条") for _ in range(1_000)]
+            latencies = []
+            postings = 0
+            for key, article in queries:
+                start = time.perf_counter()
+                postings += len(index.lookup(AnchorType.TITLE, key, article))
+                latencies.append(time.perf_counter() - start)
+            latencies.sort()
+            print(
+                f"lookup: p50 {latencies[len(latencies) // 2] * 1e6:.0f} us, "
+                f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us, "
+                f"{postings / len(queries):.1f} postings per query"
+            )
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            index.compact()
+            compact = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            # the peak is the memory held by the directory and the terms, the postings are streamed to disk.
+            print(f"compact: {len(index.segments)} segment, {compact:.1f} s, peak {peak / 1024 / 1024:.1f} MB allocated")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+    )
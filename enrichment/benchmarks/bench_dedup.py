@@ -0,0 +1,77 @@
+"""
+Enrich a corpus with reposted copies with and without the near-duplicate detection.
+- run: python benchmarks/bench_dedup.py [documents] [duplicate ratio]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hyperlink.dedup import Deduplicator  # noqa: E402
+from hyperlink.xml_text_helper import extract_anchor_offsets  # noqa: E402
+
+LAWS = ["公司法", "民法典", "刑法", "行政诉讼法", "劳动合同法", "民事诉讼法"]
+
+
+def sentence(rnd: random.Random) -> str:
+    law = rnd.choice(LAWS)
+    return (
+        f"依照<b>《中华人民共和国{law}》</b>第{rnd.randrange(1, 300)}条的规定，"
+        f"本院（{rnd.randrange(2000, 2024)}）京{rnd.randrange(1, 4):02}民终{rnd.randrange(1, 9999)}号判决"
+        f"认为{''.join(rnd.choice('当事人应当依法履行合同义务并承担相应责任') for _ in range(rnd.randrange(20, 80)))}。"
+    )
+
+
+def document(rnd: random.Random) -> list[str]:
+    return [sentence(rnd) for _ in range(rnd.randrange(100, 200))]
+
+
+def corpus(count: int, duplicate_ratio: float, seed: int = 0) -> list[bytes]:
+    rnd = random.Random(seed)
+    originals: list[list[str]] = []
+    documents = []
+    for _ in range(count):
+        if originals and rnd.random() < duplicate_ratio:
+            sentences = list(rnd.choice(originals))
+            if rnd.random() < 0.5:
+                # a near-exact repost: a header of the reposting site, and one rewritten sentence in half of them,
+                # which holds a title, so the repost falls back to the full enrichment.
+                sentences.insert(0, f"转载自第{rnd.randrange(100)}号网站。")
+                if rnd.random() < 0.5:
+                    sentences[rnd.randrange(1, len(sentences))] = sentence(rnd)
+        else:
+            sentences = document(rnd)
+            originals.append(sentences)
+        documents.append(f"<doc><p>{''.join(sentences)}</p></doc>".encode("utf-8"))
+    return documents
+
+
+def main(count: int, duplicate_ratio: float):
+    documents = corpus(count, duplicate_ratio)
+    size = sum(map(len, documents)) / 1024 / 1024
+
+    # the two runs are interleaved per document, so the drift of the machine affects both alike.
+    dedup = Deduplicator()
+    baseline = deduplicated = 0.0
+    for source in documents:
+        start = time.perf_counter()
+        extract_anchor_offsets(source)
+        middle = time.perf_counter()
+        extract_anchor_offsets(source, extract=dedup)
+        end = time.perf_counter()
+        baseline += middle - start
+        deduplicated += end - middle
+
+    print(f"{count} documents, {size:.1f} MB, {duplicate_ratio:.0%} reposted")
+    print(f"skipped: {dedup.skipped_ratio:.1%} {dedup.stats}")
+    print(f"without dedup: {baseline:.2f} s, with dedup: {deduplicated:.2f} s, speedup: {baseline / deduplicated:.2f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.4,
+    )
@@ -0,0 +1,80 @@
+"""
+Compare the sequential read -> enrich -> write loop with the asyncio pipeline, the storage latency of
+a remote store such as S3 is simulated by a delay per read and per write.
+- run: python benchmarks/bench_pipeline.py [documents] [latency ms] [workers]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hyperlink.pipeline import Pipeline, PipelineConfig, directory_writer, enrich_document, read_file  # noqa: E402
+
+PARAGRAPH = (
+    "<p>依照<emph>《中华人民共和国公司法》</emph>（以下简称《公司法》）第十六条的规定，"
+    "本院（2023）京01民终123号判决认为。<note>注释。</note>该法第二条所称公司。</p>\n"
+)
+
+
+def sequential(paths: list[str], output: str, latency: float):
+    os.makedirs(output, exist_ok=True)
+    for path in paths:
+        time.sleep(latency)
+        with open(path, "rb") as file:
+            data = file.read()
+        result, _ = enrich_document(data)
+        time.sleep(latency)
+        with open(os.path.join(output, os.path.basename(path) + ".anchors.jsonl"), "wb") as file:
+            file.write(result)
+
+
+def pipelined(paths: list[str], output: str, latency: float, workers: int):
+    write_file = directory_writer(output)
+
+    async def read(path):
+        await asyncio.sleep(latency)
+        return await read_file(path)
+
+    async def write(path, data):
+        await asyncio.sleep(latency)
+        await write_file(path, data)
+
+    pipeline = Pipeline(PipelineConfig(workers=workers), read=read, write=write)
+    return asyncio.run(pipeline.run(paths))
+
+
+def main(count: int, latency_ms: float, workers: int):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(count):
+            paths.append(os.path.join(directory, f"{i}.xml"))
+            with open(paths[-1], "w", encoding="utf-8") as file:
+                file.write(f"<doc>{PARAGRAPH * 50}</doc>")
+        latency = latency_ms / 1000
+
+        start = time.perf_counter()
+        sequential(paths, os.path.join(directory, "sequential"), latency)
+        sequential_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        metrics = pipelined(paths, os.path.join(directory, "pipelined"), latency, workers)
+        pipelined_seconds = time.perf_counter() - start
+
+    print(f"{count} documents, {latency_ms} ms latency per read and write, {workers} workers")
+    print(f"sequential: {sequential_seconds:.2f} s, {count / sequential_seconds:.0f} docs/s")
+    print(f"pipelined: {pipelined_seconds:.2f} s, {count / pipelined_seconds:.0f} docs/s "
+          f"(including the start-up of the pool), speedup: {sequential_seconds / pipelined_seconds:.2f}x")
+    for name, values in sorted(metrics.to_dict()["samples"].items()):
+        print(f"  {name}: mean {values['mean']:.1f}, max {values['max']}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 10,
+        int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1,
+    )
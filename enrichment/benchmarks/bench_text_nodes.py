@@ -0,0 +1,50 @@
+"""
+Compare the tree path (Texts + extract_anchors_from_xml) with the parser-target path (extract_anchor_offsets).
+- run: python benchmarks/bench_text_nodes.py [paragraphs]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hyperlink.xml_text_helper import Texts, etree, collect_text_nodes, extract_anchor_offsets, extract_anchors_from_xml  # noqa: E402
+
+PARAGRAPH = (
+    "<p>依照<emph>《中华人民共和国公司法》</emph>（以下简称《公司法》）第十六条的规定，"
+    "本院（2023）京01民终123号判决认为。<note>注释。</note>该法第二条所称公司。</p>\n"
+)
+
+
+def timeit(func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(paragraphs: int):
+    with tempfile.NamedTemporaryFile("w", suffix=".xml", encoding="utf-8", delete=False) as file:
+        file.write("<doc>\n" + PARAGRAPH * paragraphs + "</doc>\n")
+    try:
+        size = os.path.getsize(file.name) / 1024 / 1024
+        print(f"file: {size:.1f} MB, {paragraphs} paragraphs")
+        cases = {
+            "tree: text nodes": lambda: Texts(etree.parse(file.name).getroot()),
+            "target: text nodes": lambda: collect_text_nodes(file.name),
+            "tree: anchors": lambda: extract_anchors_from_xml(etree.parse(file.name).getroot()),
+            "target: anchors": lambda: extract_anchor_offsets(file.name),
+        }
+        for name, func in cases.items():
+            elapsed = timeit(func)
+            print(f"{name:<20} {elapsed * 1000:>9.1f} ms {size / elapsed:>7.1f} MB/s")
+    finally:
+        os.remove(file.name)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,52 @@
+"""
+Scan synthetic mixed text for case numbers and stage keywords and measure the throughput.
+The throughput depends on how dense the case numbers are, so it is measured per density, the share of
+the clauses which are case numbers, about 1% in a typical judgment.
+- run: python benchmarks/bench_trial_progress.py [megabytes]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from hyperlink.trial_progress import TrialProgressExtractor  # noqa: E402
+
+FILLER = "本院认为，上诉人的上诉请求不能成立，应予驳回。原审判决认定事实清楚，适用法律正确。"
+CASES = ["（{}）京01民初{}号", "({})沪0115民终{}号", "〔{}〕最高法民申{}号", "一审案号（{}）粤03执{}号"]
+
+
+def document(rnd: random.Random, chars: int, density: float) -> str:
+    parts, size = [], 0
+    while size < chars:
+        part = FILLER if rnd.random() >= density else rnd.choice(CASES).format(rnd.randrange(2000, 2025), rnd.randrange(1, 9999))
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def main(megabytes: int):
+    extractor = TrialProgressExtractor()
+    for density in (0.0, 0.01, 0.05, 0.2):
+        rnd = random.Random(0)
+        # documents of about 20k characters, i.e. about 60 KB in UTF-8.
+        documents = []
+        size = 0
+        while size < megabytes * 1024 * 1024:
+            documents.append(document(rnd, 20_000, density))
+            size += len(documents[-1].encode("utf-8"))
+
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            anchors = sum(len(extractor.extract(x)) for x in documents)
+            best = min(best, time.perf_counter() - start)
+        print(
+            f"density {density:.0%}: {len(documents)} documents, {size / 1024 / 1024:.0f} MB, {anchors} anchors, "
+            f"{best:.2f} s, {size / 1024 / 1024 / best:.0f} MB/s"
+        )
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
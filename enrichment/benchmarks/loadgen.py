@@ -0,0 +1,91 @@
+"""
+A load generator of the enrichment server, it reports the throughput and the tail latency at a given concurrency.
+- run: python benchmarks/loadgen.py --unix /tmp/enrichment.sock --concurrency 64 --requests 10000
+- run against an in-process server: python benchmarks/loadgen.py --spawn --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import orjson  # noqa: E402
+
+from hyperlink.server import EnrichmentServer, ServerConfig  # noqa: E402
+
+DOCUMENT = (
+    "《中华人民共和国公司法》（以下简称《公司法》）第十六条规定，公司向其他企业投资或者为他人提供担保。"
+    "本院（2023）京01民终123号判决认为，依照《公司法》及该法第二条，驳回上诉。"
+)
+
+
+async def client(connect, requests: int, sizes: int, deadline_ms: float, latencies: list, errors: list):
+    reader, writer = await connect()
+    content = DOCUMENT * sizes
+    for i in range(requests):
+        started = time.perf_counter()
+        writer.write(orjson.dumps({"id": i, "content": content, "deadline_ms": deadline_ms}) + b"\n")
+        await writer.drain()
+        response = orjson.loads(await reader.readline())
+        latencies.append(time.perf_counter() - started)
+        if "error" in response:
+            errors.append(response["error"])
+    writer.close()
+
+
+def percentile(values: list, ratio: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+async def run(args):
+    server = None
+    unix = args.unix
+    if args.spawn:
+        unix = os.path.join(tempfile.mkdtemp(), "enrichment.sock")
+        server = await EnrichmentServer(ServerConfig(workers=args.workers)).start(unix)
+
+    async def connect():
+        if unix:
+            return await asyncio.open_unix_connection(unix, limit=2 ** 24)
+        return await asyncio.open_connection("127.0.0.1", args.port, limit=2 ** 24)
+
+    latencies, errors = [], []
+    per_client = max(1, args.requests // args.concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(connect, per_client, args.size, args.deadline_ms, latencies, errors) for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    if server:
+        await server.stop()
+
+    latencies.sort()
+    print(
+        f"{len(latencies)} requests, concurrency {args.concurrency}, {elapsed:.2f} s, "
+        f"{len(latencies) / elapsed:.0f} req/s, {len(errors)} errors\n"
+        f"latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+        f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+        f"max {latencies[-1] * 1000:.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load against the enrichment server.")
+    parser.add_argument("--unix")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--spawn", action="store_true", help="start an in-process server on a temporary socket.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--size", type=int, default=1, help="how many times the sample document is repeated.")
+    parser.add_argument("--deadline-ms", type=float, default=5_000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
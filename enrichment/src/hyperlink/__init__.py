@@ -0,0 +1,51 @@
+"""
+The hyperlink enrichment package, the public names are imported lazily on the first access (PEP 562),
+so `import hyperlink` does not import the extractors and their dependencies up front.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'AnchorType': 'anchor_extractor',
+    'Anchor': 'anchor_extractor',
+    'Keyword': 'anchor_extractor',
+    'PairedKeyword': 'anchor_extractor',
+    'PairedKeywordExtractor': 'anchor_extractor',
+    'ReadonlyNavigableDict': 'anchor_extractor',
+    'SentenceSplitter': 'anchor_extractor',
+    'TitleExtractor': 'anchor_extractor',
+    'AbbreviationResolver': 'anchor_extractor',
+    'TrialProgressExtractor': 'trial_progress',
+    'NormalizedText': 'normalizer',
+    'Citation': 'citation_index',
+    'CitationIndex': 'citation_index',
+    'CitationGraph': 'citation_graph',
+    'AnchorReader': 'anchor_format',
+    'FuzzyTitleResolver': 'fuzzy_title',
+    'Metrics': 'metrics',
+    'SlowDocumentCapture': 'metrics',
+    'Deduplicator': 'dedup',
+    'Pipeline': 'pipeline',
+    'PipelineConfig': 'pipeline',
+    'Catalog': 'catalog',
+    'CatalogHandle': 'catalog',
+    'Texts': 'xml_text_helper',
+    'read_xml': 'xml_text_helper',
+    'extract_anchors_by_sentence': 'xml_text_helper',
+    'extract_anchors_from_xml': 'xml_text_helper',
+    'lazy_import': '_lazy',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,96 @@
+"""
+The helpers shared by the on-disk formats: the atomic writes, the string tables and the bisect views.
+
+A string table is laid out as the U32 offsets of the strings, one more for the end of the last string,
+followed by the utf-8 blob of the strings, so a string is read in place by its id.
+"""
+
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, IO, Iterator
+
+U32 = struct.Struct('<I')
+U32_PAIR = struct.Struct('<II')
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'wb', fsync: bool = True) -> Iterator[IO]:
+    """
+    Open a file aside the given path and rename it into place once the block is done,
+    so a reader never sees a partial file, the file is removed if the block fails.
+    The name of the file is unique per process and thread, so the concurrent writers of a path never share it.
+    :params bool fsync - flush the file to the disk before the rename, so the renamed file survives a crash.
+    """
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, mode, encoding=None if 'b' in mode else 'utf-8') as file:
+            yield file
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def pack_strings(strings: list[str]) -> bytes:
+    """
+    Returns the string table of the given strings, the id of a string is its index.
+    """
+    encoded = [x.encode('utf-8') for x in strings]
+    offsets = bytearray()
+    position = 0
+    for value in encoded:
+        offsets += U32.pack(position)
+        position += len(value)
+    offsets += U32.pack(position)
+    return b''.join([offsets, *encoded])
+
+
+class StringTable:
+    """
+    Reads the strings of a string table in place, the buffer is a memoryview of bytes or a mmap.
+    """
+
+    def __init__(self, buffer: memoryview, offset: int, count: int):
+        self.__buffer = buffer
+        self.__offset = offset
+        self.__blob_offset = offset + U32.size * (count + 1)
+        self.__count = count
+
+    def __len__(self):
+        return self.__count
+
+    def __getitem__(self, string_id: int) -> str:
+        return str(self.raw(string_id), 'utf-8')
+
+    def raw(self, string_id: int) -> bytes:
+        """
+        Returns the utf-8 bytes of the given string.
+        """
+        start, end = U32_PAIR.unpack_from(self.__buffer, self.__offset + string_id * U32.size)
+        return bytes(self.__buffer[self.__blob_offset + start:self.__blob_offset + end])
+
+
+class KeyView:
+    """
+    A lazy sequence of the sorted keys of an on-disk section, so that bisect searches the section in place.
+    """
+
+    __slots__ = ('__length', '__key')
+
+    def __init__(self, length: int, key: Callable[[int], Any]):
+        self.__length = length
+        self.__key = key
+
+    def __len__(self):
+        return self.__length
+
+    def __getitem__(self, index: int):
+        return self.__key(index)
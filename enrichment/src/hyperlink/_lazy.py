@@ -0,0 +1,29 @@
+"""
+The module provides a helper to import the heavy dependencies (lxml, boto3, ahocorasick...) lazily,
+so that importing the package stays cheap for short-lived workers and CLI invocations.
+"""
+
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    A placeholder of a module which is imported on the first access of its attributes.
+    importlib.util.LazyLoader is not used because it does not support the extension modules such as lxml.etree.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__module = None
+
+    def __getattr__(self, item):
+        if item.startswith('_LazyModule__'):
+            raise AttributeError(item)
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name__)
+        return getattr(self.__module, item)
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    return LazyModule(name)
@@ -0,0 +1,23 @@
+"""
+The helpers shared by the process pools of the server and the pipeline.
+"""
+
+WARM_UP_DOCUMENT = '《中华人民共和国公司法》（以下简称《公司法》）第十条，本院（2023）京01民终123号判决。'
+
+
+def warm_up():
+    """
+    The initializer of worker processes, it imports the extractors and compiles their patterns up front.
+    """
+    from .xml_text_helper import extract_anchors, extract_anchor_offsets
+    extract_anchors(WARM_UP_DOCUMENT)
+    extract_anchor_offsets(f'<p>{WARM_UP_DOCUMENT}</p>'.encode('utf-8'))
+
+
+def anchor_to_dict(anchor) -> dict:
+    return {
+        'value': anchor.value,
+        'start_index': anchor.start_index,
+        'end_index': anchor.end_index,
+        'type': anchor.type.name,
+    }
@@ -1,5 +1,6 @@
 import re
 import bisect
+from functools import lru_cache
 from collections import OrderedDict, UserDict
 from dataclasses import dataclass, field
 from enum import Enum
@@ -65,6 +66,8 @@ class Anchor(Keyword):
     type: AnchorType
     parent: "Anchor" = field(init=False, default=None)
     version: str = field(init=False, default=None)
+    # the anchor which an abbreviation or a self-reference is resolved to.
+    target: "Anchor" = field(init=False, default=None, repr=False, compare=False)
 
 
 KT = TypeVar('KT')
@@ -83,13 +86,15 @@ class ReadonlyNavigableDict(OrderedDict, Generic[KT, VT]):
         self.__readonly = False
         super().__init__(sorted(dict(data).items(), key=lambda x: x[0]))
         self.__readonly = True
+        # the dict is readonly, so the sorted keys are built once and every lookup is O(log n).
+        self.__sorted_keys = list(self)
 
     def floor_key(self, key: KT) -> KT:
         """
         Returns The greatest key less than or equal to the given key,
         or None if their no such key.
         """
-        sorted_keys = list(self)
+        sorted_keys = self.__sorted_keys
         index = bisect.bisect_right(sorted_keys, key)
         if index:
             return sorted_keys[index - 1]
@@ -99,7 +104,7 @@ class ReadonlyNavigableDict(OrderedDict, Generic[KT, VT]):
         Returns the smallest key greater than or equal to the given key,
         or None if their no such key.
         """
-        sorted_keys = list(self)
+        sorted_keys = self.__sorted_keys
         index = bisect.bisect_left(sorted_keys, key)
         if index != len(sorted_keys):
             return sorted_keys[index]
@@ -144,10 +149,12 @@ class PairedKeywordExtractor:
         self.pair_set = frozenset('|'.join(pair) for pair in pairs.items())
         self.pair_pattern = re.compile('|'.join(self.pair_set))
 
-    def extract(self, text: str) -> list[PairedKeyword]:
+    def extract(self, text: str, start: int = 0, end: int = None) -> list[PairedKeyword]:
         """
         Extract the keywords enclosed within pairs from the given text.
         :params str text - the text to extract the keywords from.
+        :params int start - the index to start scanning from, the offsets of keywords are still relative to text.
+        :params int end - the index to stop scanning at, defaults to the length of text.
         :return list[PairedKeyword] - the list of keywords extracted from the text.
         """
         if not text:
@@ -156,7 +163,8 @@ class PairedKeywordExtractor:
         stack: list[tuple[int, str]] = []
         child_with_parent_index_dict: dict[int, int] = {}
         start_index_with_word_dict: dict[int, PairedKeyword] = {}
-        for matcher in self.pair_pattern.finditer(text):
+        end = len(text) if end is None else end
+        for matcher in self.pair_pattern.finditer(text, start, end):
             cur = (matcher.start(), matcher.group())
             if stack and self.ispair(
                     (top := stack[-1])[1], cur[1]
@@ -191,15 +199,188 @@ class PairedKeywordExtractor:
         return f"{left}|{right}" in self.pair_set
 
 
+class SentenceSplitter:
+    """
+    Splits a text into sentences by the given separators, the separators are kept at the end of each sentence.
+    The pattern is compiled once, and the sentences are yielded lazily as (start_index, end_index) spans
+    over the original text, so no sentence is copied unless the caller slices it.
+    A separator enclosed within pairs (e.g. 《》) does not end a sentence, so that a keyword never straddles
+    two sentences. If a pair is never closed, the separators seen after its left part are honored again.
+    """
+
+    def __init__(self, separators: list[str], pairs: dict[str, str] = None):
+        if not separators:
+            raise ValueError("The separators must be not empty.")
+        pairs = {'《': '》'} if pairs is None else pairs
+        self.separators = frozenset(separators)
+        self.lefts = frozenset(pairs.keys())
+        self.rights = frozenset(pairs.values())
+        tokens = sorted({*self.separators, *self.lefts, *self.rights}, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(token) for token in tokens))
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def of(cls, separators: tuple[str, ...]) -> "SentenceSplitter":
+        """
+        Returns the cached splitter of the given separators, so the pattern is compiled once per separators.
+        """
+        return cls(list(separators))
+
+    def spans(self, text: str):
+        """
+        Yield the (start_index, end_index) of each non-empty sentence in the given text.
+        :params str text - the text to split.
+        :return Iterator[tuple[int, int]] - the spans of sentences, end_index is exclusive.
+        """
+        if not text:
+            return
+
+        depth = 0
+        start_index = 0
+        # the end indexes of separators which are enclosed within a pair that is not closed yet.
+        deferred: list[int] = []
+        separators, lefts, rights = self.separators, self.lefts, self.rights
+        for matcher in self.pattern.finditer(text):
+            token = matcher.group()
+            if token in lefts:
+                depth += 1
+            elif token in rights:
+                if depth:
+                    depth -= 1
+                    if not depth:
+                        deferred.clear()
+            elif token in separators:
+                if depth:
+                    deferred.append(matcher.end())
+                else:
+                    yield start_index, matcher.end()
+                    start_index = matcher.end()
+
+        # the left part of a pair is missing its right part, so split it as if there were no pair.
+        for end_index in deferred:
+            yield start_index, end_index
+            start_index = end_index
+
+        if start_index < len(text):
+            yield start_index, len(text)
+
+    def split(self, text: str) -> list[str]:
+        """
+        Split the given text into sentences.
+        :params str text - the text to split.
+        :return list[str] - the sentences with their separators.
+        """
+        return [text[start:end] for start, end in self.spans(text)]
+
+
 class TitleExtractor:
     __extractor = PairedKeywordExtractor({'《': '》'})
 
-    def extract(self, content: str):
+    def extract(self, content: str, start: int = 0, end: int = None):
         outermost_anchors = []
-        keywords = self.__extractor.extract(content)
+        keywords = self.__extractor.extract(content, start, end)
         for keyword in keywords:
             if not keyword.parent:
                 outermost_anchors.append(
                     Anchor(keyword.value, keyword.start_index, keyword.end_index, AnchorType.TITLE)
                 )
         return outermost_anchors
+
+
+class AbbreviationResolver:
+    """
+    Resolves the abbreviations and self-references of a document to the titles they stand for, e.g.
+    《中华人民共和国公司法》（以下简称《公司法》） defines the abbreviation 《公司法》, and 该法 refers to the
+    title mentioned before it.
+    The document is scanned once, each definition is recorded in an offset-keyed table per abbreviation,
+    and every reference is resolved by a floor lookup to the nearest preceding definition, so resolving
+    r references against d definitions costs O(r log d) on top of the linear scan.
+    """
+    __definition_pattern = re.compile(r'[（(]\s*(?:以下)?简称\s*(?:《(?P<title>[^《》]+)》|[“"「](?P<word>[^”"」]+)[”"」])\s*[）)]')
+    # 本法院, 该法律 and the like are not self-references, nor are the words ending in 本 or 该,
+    # e.g. 基本规定, 根本法, 日本法 and 应该规定.
+    __self_ref_pattern = re.compile(
+        r'(?P<scope>(?<![基根成资日版样文剧账原副脚课读范标底蓝])本|(?<![应活])该)'
+        r'(?:法|条例|规定|办法|决定|解释)(?![律规院庭官])'
+    )
+
+    def resolve(self, content: str, anchors: list[Anchor], doc_title: str = None) -> list[Anchor]:
+        """
+        Resolve the abbreviations and self-references within the given content.
+        :params str content - the content which the anchors are extracted from.
+        :params list[Anchor] anchors - the title anchors extracted from the content.
+        :params str doc_title - the title of the document itself, which 本法 refers to.
+        :return list[Anchor] - the given anchors, the abbreviations among them are retyped to ABBREVIATION,
+            together with the anchors of unbracketed abbreviations and self-references, ordered by start index.
+        """
+        if not content:
+            return list(anchors)
+
+        titles = sorted(
+            (x for x in anchors if x.type in (AnchorType.TITLE, AnchorType.ABBREVIATION)),
+            key=lambda x: x.start_index,
+        )
+        title_by_end_index = {x.end_index: x for x in titles}
+        title_by_start_index = ReadonlyNavigableDict[int, Anchor]({x.start_index: x for x in titles})
+
+        result = list(anchors)
+        definitions: dict[str, dict[int, Anchor]] = {}
+        defined_words: set[str] = set()
+        defined_word_indexes: set[int] = set()
+        for matcher in self.__definition_pattern.finditer(content):
+            head = matcher.start()
+            while head and content[head - 1].isspace():
+                head -= 1
+            if not (full_title := title_by_end_index.get(head)):
+                continue
+            full_title = full_title.target or full_title
+            if word := matcher.group('word'):
+                alias = Anchor(word, matcher.start('word'), matcher.end('word'), AnchorType.ABBREVIATION)
+                alias.target = full_title
+                result.append(alias)
+                defined_words.add(word)
+                defined_word_indexes.add(alias.start_index)
+            else:
+                word = matcher.group('title')
+                if alias := title_by_start_index.get(matcher.start('title') - 1):
+                    alias.type = AnchorType.ABBREVIATION
+                    alias.target = full_title
+            definitions.setdefault(word, {})[matcher.end()] = full_title
+
+        tables = {k: ReadonlyNavigableDict[int, Anchor](v) for k, v in definitions.items()}
+
+        # the bracketed abbreviations are already title anchors, retype them if they are defined before.
+        for title in titles:
+            if (table := tables.get(title.value[1:-1])) and (entry := table.floor_item(title.start_index)):
+                title.type = AnchorType.ABBREVIATION
+                title.target = entry[1]
+
+        # the unbracketed abbreviations are plain words, only the ones out of any title are references.
+        if defined_words:
+            word_pattern = re.compile('|'.join(re.escape(x) for x in sorted(defined_words, key=len, reverse=True)))
+            for matcher in word_pattern.finditer(content):
+                if matcher.start() in defined_word_indexes or self.__within(title_by_start_index, matcher.start()):
+                    continue
+                if entry := tables[matcher.group()].floor_item(matcher.start()):
+                    alias = Anchor(matcher.group(), matcher.start(), matcher.end(), AnchorType.ABBREVIATION)
+                    alias.target = entry[1]
+                    result.append(alias)
+
+        doc_anchor = Anchor(doc_title, 0, 0, AnchorType.TITLE) if doc_title else None
+        for matcher in self.__self_ref_pattern.finditer(content):
+            if self.__within(title_by_start_index, matcher.start()):
+                continue
+            self_ref = Anchor(matcher.group(), matcher.start(), matcher.end(), AnchorType.SELF_REF)
+            if matcher.group('scope') == '本':
+                self_ref.target = doc_anchor
+            elif entry := title_by_start_index.floor_item(matcher.start()):
+                self_ref.target = entry[1].target or entry[1]
+            result.append(self_ref)
+
+        result.sort(key=lambda x: x.start_index)
+        return result
+
+    @staticmethod
+    def __within(title_by_start_index: ReadonlyNavigableDict, index: int) -> bool:
+        entry = title_by_start_index.floor_item(index)
+        return entry is not None and entry[1].end_index > index
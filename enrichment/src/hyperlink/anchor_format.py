@@ -0,0 +1,237 @@
+"""
+A compact, versioned binary format of the anchors of one document, and its zero-copy reader.
+
+The layout is:
+    header   - magic, version, record count, string count and the offset of the string table.
+    records  - one fixed-width record per anchor ordered by start index:
+               start, end, anchor type code, flags, value/version string ids, target and parent record indexes.
+    strings  - the offsets of the strings followed by the utf-8 blob.
+The reader works over a memoryview of bytes or a mmap, so the consumers filter the anchors by type
+or by offset range while reading only the fields they need, and no anchor is built until it is asked for.
+"""
+
+import mmap
+import bisect
+import struct
+from typing import Iterable, Iterator, NamedTuple
+
+from ._io import U32, KeyView, StringTable, atomic_write, pack_strings
+from ._lazy import lazy_import
+from .anchor_extractor import Anchor, AnchorType
+from .metrics import Metrics, NULL_METRICS
+
+orjson = lazy_import('orjson')
+
+MAGIC = b'ANCR'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIQ')
+RECORD = struct.Struct('<IIBBHiiii')
+NONE = -1
+# the record is only the target or the parent of other anchors, e.g. the document title which 本法 refers to.
+FLAG_EXTERNAL = 0x01
+
+
+class AnchorRecord(NamedTuple):
+    start_index: int
+    end_index: int
+    type: int
+    flags: int
+    reserved: int
+    value: int
+    version: int
+    target: int
+    parent: int
+
+
+def dumps(anchors: Iterable[Anchor]) -> bytes:
+    """
+    Serialize the anchors of a document, the parents and targets are kept as record indexes.
+    """
+    anchors = sorted(anchors, key=lambda x: (x.start_index, x.end_index))
+    indexes = {id(x): i for i, x in enumerate(anchors)}
+    flags = [0] * len(anchors)
+    # the parents and targets out of the anchors are appended as external records, and so are theirs in turn,
+    # e.g. the parent of a case number in another text node, or the document title which 本法 refers to.
+    index = 0
+    while index < len(anchors):
+        for related in (anchors[index].target, anchors[index].parent):
+            if related is not None and id(related) not in indexes:
+                indexes[id(related)] = len(anchors)
+                anchors.append(related)
+                flags.append(FLAG_EXTERNAL)
+        index += 1
+
+    strings: list[str] = []
+    string_ids: dict[str, int] = {}
+
+    def string_id(value: str) -> int:
+        if value is None:
+            return NONE
+        if (sid := string_ids.get(value)) is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value)
+        return sid
+
+    records = bytearray()
+    for anchor, flag in zip(anchors, flags):
+        records += RECORD.pack(
+            anchor.start_index,
+            anchor.end_index,
+            anchor.type.value,
+            flag,
+            0,
+            string_id(anchor.value),
+            string_id(anchor.version),
+            indexes.get(id(anchor.target), NONE),
+            indexes.get(id(anchor.parent), NONE),
+        )
+
+    header = HEADER.pack(MAGIC, VERSION, 0, len(anchors), len(strings), HEADER.size + len(records))
+    return b''.join([header, records, pack_strings(strings)])
+
+
+class AnchorReader:
+    """
+    Reads the anchors from a buffer in the binary format without deserializing the whole buffer.
+    """
+
+    def __init__(self, buffer):
+        self.__source = buffer
+        self.__buffer = memoryview(buffer)
+        magic, version, _, self.record_count, self.string_count, strings_offset = HEADER.unpack_from(self.__buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"The buffer is not in the anchor format of version {VERSION}.")
+        self.__strings = StringTable(self.__buffer, strings_offset, self.string_count)
+        # the external records are appended after the anchors, their start indexes are not ordered.
+        self.__anchor_count = self.record_count
+        while self.__anchor_count and self.record(self.__anchor_count - 1).flags & FLAG_EXTERNAL:
+            self.__anchor_count -= 1
+
+    def __len__(self):
+        return self.__anchor_count
+
+    def record(self, index: int) -> AnchorRecord:
+        return AnchorRecord._make(RECORD.unpack_from(self.__buffer, HEADER.size + index * RECORD.size))
+
+    def type_of(self, index: int) -> AnchorType:
+        return AnchorType(self.__buffer[HEADER.size + index * RECORD.size + 8])
+
+    def start_of(self, index: int) -> int:
+        return U32.unpack_from(self.__buffer, HEADER.size + index * RECORD.size)[0]
+
+    def string(self, string_id: int) -> str:
+        if string_id == NONE:
+            return None
+        return self.__strings[string_id]
+
+    def find(self, types: Iterable[AnchorType] = None, start_index: int = None, end_index: int = None) -> Iterator[int]:
+        """
+        Yield the indexes of anchors of the given types and within [start_index, end_index).
+        """
+        codes = {x.value for x in types} if types is not None else None
+        low = 0 if start_index is None else bisect.bisect_left(KeyView(len(self), self.start_of), start_index)
+        buffer = self.__buffer
+        for index in range(low, len(self)):
+            base = HEADER.size + index * RECORD.size
+            if end_index is not None:
+                start, end = struct.unpack_from('<II', buffer, base)
+                if start >= end_index:
+                    break
+                if end > end_index:
+                    continue
+            if codes is not None and buffer[base + 8] not in codes:
+                continue
+            yield index
+
+    def anchors(self, indexes: Iterable[int] = None) -> list[Anchor]:
+        """
+        Build the anchors of the given indexes, all anchors by default.
+        The parents and targets are built on demand, so they are the same objects within one call.
+        """
+        built: dict[int, Anchor] = {}
+
+        def build(index: int) -> Anchor:
+            if (anchor := built.get(index)) is not None:
+                return anchor
+            record = self.record(index)
+            anchor = built[index] = Anchor(
+                self.string(record.value), record.start_index, record.end_index, AnchorType(record.type)
+            )
+            anchor.version = self.string(record.version)
+            if record.parent != NONE:
+                anchor.parent = build(record.parent)
+            if record.target != NONE:
+                anchor.target = build(record.target)
+            return anchor
+
+        return [build(x) for x in (range(len(self)) if indexes is None else indexes)]
+
+    def release(self):
+        self.__buffer.release()
+        if isinstance(self.__source, mmap.mmap):
+            self.__source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+def loads(buffer) -> list[Anchor]:
+    return AnchorReader(buffer).anchors()
+
+
+def write(path: str, anchors: Iterable[Anchor], metrics: Metrics = NULL_METRICS):
+    with metrics.stage('write'):
+        data = dumps(anchors)
+        with atomic_write(path) as file:
+            file.write(data)
+    metrics.count('bytes_written', len(data))
+
+
+def open_reader(path: str) -> AnchorReader:
+    """
+    Memory-map the given file and return its reader, the mapping is released with the reader.
+    """
+    with open(path, 'rb') as file:
+        return AnchorReader(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+def to_jsonl(anchors: Iterable[Anchor]) -> bytes:
+    """
+    Convert the anchors into JSON Lines, the parents and targets are referenced by line indexes.
+    """
+    reader = AnchorReader(dumps(anchors))
+    lines = []
+    for index in range(reader.record_count):
+        record = reader.record(index)
+        lines.append(orjson.dumps({
+            'value': reader.string(record.value),
+            'start_index': record.start_index,
+            'end_index': record.end_index,
+            'type': AnchorType(record.type).name,
+            'version': reader.string(record.version),
+            'external': bool(record.flags & FLAG_EXTERNAL),
+            'target': None if record.target == NONE else record.target,
+            'parent': None if record.parent == NONE else record.parent,
+        }))
+    return b'\n'.join(lines) + b'\n' if lines else b''
+
+
+def from_jsonl(data: bytes) -> list[Anchor]:
+    """
+    Convert the JSON Lines written by to_jsonl back into anchors, the external targets are left out.
+    """
+    items = [orjson.loads(line) for line in data.splitlines() if line.strip()]
+    anchors = []
+    for item in items:
+        anchor = Anchor(item['value'], item['start_index'], item['end_index'], AnchorType[item['type']])
+        anchor.version = item['version']
+        anchors.append(anchor)
+    for item, anchor in zip(items, anchors):
+        if item['parent'] is not None:
+            anchor.parent = anchors[item['parent']]
+        if item['target'] is not None:
+            anchor.target = anchors[item['target']]
+    return [x for item, x in zip(items, anchors) if not item['external']]
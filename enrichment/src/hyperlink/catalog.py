@@ -0,0 +1,268 @@
+"""
+The compiled law catalog: the names, aliases and revisions (DocMeta) of the laws are compiled by a build step
+into one versioned artifact, which holds the sorted name index and the revision index.
+
+The artifact is laid out as:
+    header      - magic, version, build time, the counts and the offsets of the sections below.
+    strings     - the offsets of the strings followed by the utf-8 blob.
+    keys        - (string id, law id) of every name and alias, sorted by the utf-8 bytes of the name.
+    laws        - the short name string id and the first revision of every law, the revisions of a law are contiguous.
+    revisions   - the year and the name string id of every revision, sorted by year within a law.
+The sections are memory-mapped and read in place as little-endian int32s. The ahocorasick automaton over the
+names and aliases is built from the mapped keys on its first use, so the artifact holds no pickle, which would run
+code on load, and does not depend on the build of pyahocorasick.
+A CatalogHandle swaps in a rebuilt artifact atomically, the documents in flight keep the catalog they started with.
+"""
+
+import os
+import re
+import mmap
+import time
+import bisect
+import struct
+import sys
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from ._io import KeyView, StringTable, atomic_write, pack_strings
+from ._lazy import lazy_import
+
+ahocorasick = lazy_import('ahocorasick')
+
+MAGIC = b'LCAT'
+VERSION = 2
+HEADER = struct.Struct('<4sHHdIIIIQQQQ')
+KEY = struct.Struct('<ii')
+LAW = struct.Struct('<ii')
+REVISION = struct.Struct('<ii')
+
+
+@dataclass(frozen=True)
+class DocMeta:
+    name: str
+    short_name: str
+    year: int
+
+
+# the revision suffix of a name, e.g. 公司法(2019修正).
+REVISION_PATTERN = re.compile(r'[(（](?P<year>\d{4})年?(?:修正|修订|修改)?[)）]$')
+
+
+def split_revision(name: str) -> tuple[str, int]:
+    """
+    Split the given name into the name without revision suffix and the year of the revision, or None if there is no suffix.
+    """
+    if matcher := REVISION_PATTERN.search(name):
+        return name[:matcher.start()], int(matcher.group('year'))
+    return name, None
+
+
+def _align(buffer: bytearray, size: int = 8):
+    buffer.extend(bytes(-len(buffer) % size))
+
+
+def build_catalog(path: str, docs: Iterable[DocMeta], aliases: dict[str, str] = None) -> str:
+    """
+    Compile the revisions of laws into an artifact, the artifact is written aside and renamed into place.
+    :params str path - the path of the artifact.
+    :params Iterable[DocMeta] docs - the revisions, the revisions of a law share the same short name.
+    :params dict[str, str] aliases - the aliases of the short names, e.g. {'公司法典': '公司法'}.
+    :return str - the path of the artifact.
+    """
+    revisions_by_law: dict[str, list[DocMeta]] = {}
+    for doc in docs:
+        revisions_by_law.setdefault(doc.short_name, []).append(doc)
+
+    strings: list[str] = []
+    string_ids: dict[str, int] = {}
+
+    def string_id(value: str) -> int:
+        if (sid := string_ids.get(value)) is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value)
+        return sid
+
+    laws = bytearray()
+    revisions = bytearray()
+    law_ids: dict[str, int] = {}
+    revision_count = 0
+    for law_id, (short_name, law_revisions) in enumerate(revisions_by_law.items()):
+        laws += LAW.pack(string_id(short_name), revision_count)
+        law_ids[short_name] = law_id
+        for doc in sorted(law_revisions, key=lambda x: x.year):
+            revisions += REVISION.pack(doc.year, string_id(doc.name))
+            revision_count += 1
+            law_ids.setdefault(split_revision(doc.name)[0], law_id)
+    laws += LAW.pack(-1, revision_count)
+    for alias, short_name in (aliases or {}).items():
+        if short_name in law_ids:
+            law_ids.setdefault(alias, law_ids[short_name])
+
+    sorted_keys = sorted(law_ids.items(), key=lambda x: x[0].encode('utf-8'))
+    keys = bytearray()
+    for name, law_id in sorted_keys:
+        keys += KEY.pack(string_id(name), law_id)
+
+    string_section = pack_strings(strings)
+
+    # every section starts at a multiple of 8 bytes, so it can be cast into an array in place.
+    base = HEADER.size + (-HEADER.size % 8)
+    offsets = []
+    payload = bytearray()
+    for section in (string_section, keys, laws, revisions):
+        offsets.append(base + len(payload))
+        payload += section
+        _align(payload)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, 0, time.time(),
+        len(strings), len(sorted_keys), len(revisions_by_law), revision_count,
+        *offsets,
+    )
+    with atomic_write(path) as file:
+        file.write(header)
+        file.write(bytes(-HEADER.size % 8))
+        file.write(payload)
+    return path
+
+
+class Catalog:
+    """
+    A memory-mapped artifact of the law catalog.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.__mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self.__mmap)
+        (magic, version, _, self.built_at, string_count, self.key_count, self.law_count, revision_count,
+         strings_offset, keys_offset, laws_offset, revisions_offset) = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"The {path} is not a law catalog of version {VERSION}.")
+        self.__strings = StringTable(buffer, strings_offset, string_count)
+        self.__keys = _int32s(buffer, keys_offset, KEY.size * self.key_count)
+        self.__laws = _int32s(buffer, laws_offset, LAW.size * (self.law_count + 1))
+        self.__revisions = _int32s(buffer, revisions_offset, REVISION.size * revision_count)
+        self.__automaton = None
+
+    def string(self, string_id: int) -> str:
+        return self.__strings[string_id]
+
+    def law_id(self, name: str) -> int:
+        """
+        Returns the id of the law which has the given name or alias, or -1 if there is no such law.
+        """
+        encoded = name.encode('utf-8')
+        index = bisect.bisect_left(KeyView(self.key_count, self.key), encoded)
+        if index < self.key_count and self.key(index) == encoded:
+            return self.__keys[index * 2 + 1]
+        return -1
+
+    def revisions(self, law_id: int) -> list[DocMeta]:
+        laws, revisions = self.__laws, self.__revisions
+        short_name = self.string(laws[law_id * 2])
+        return [
+            DocMeta(self.string(revisions[i * 2 + 1]), short_name, revisions[i * 2])
+            for i in range(laws[law_id * 2 + 1], laws[law_id * 2 + 3])
+        ]
+
+    def find(self, name: str, year: int) -> DocMeta:
+        """
+        Find the revision of the given law in effect in the given year, the revision suffix of the name wins over the year,
+        e.g. find('公司法', 2012) is the latest revision before 2012, find('公司法(2019修正)', 2024) is the revision 2019.
+        """
+        base_name, revision_year = split_revision(name)
+        if (law_id := self.law_id(base_name)) < 0:
+            return None
+        year = revision_year or year
+        laws, revisions = self.__laws, self.__revisions
+        low, high = laws[law_id * 2 + 1], laws[law_id * 2 + 3]
+        index = bisect.bisect_right(KeyView(high, lambda x: revisions[x * 2]), year, low, high) - 1
+        if index < low:
+            return None
+        return DocMeta(self.string(revisions[index * 2 + 1]), self.string(laws[law_id * 2]), revisions[index * 2])
+
+    @property
+    def automaton(self):
+        """
+        The automaton over the names and aliases, whose values are the (law id, length) of the names.
+        It is built from the mapped keys on the first use, a concurrent first use builds the same automaton.
+        """
+        if self.__automaton is None:
+            automaton = ahocorasick.Automaton()
+            keys = self.__keys
+            for index in range(self.key_count):
+                name = self.string(keys[index * 2])
+                automaton.add_word(name, (keys[index * 2 + 1], len(name)))
+            automaton.make_automaton()
+            self.__automaton = automaton
+        return self.__automaton
+
+    def scan(self, text: str) -> Iterator[tuple[int, int, int]]:
+        """
+        Yield the (start index, end index, law id) of the names and aliases within the given text.
+        """
+        for end_index, (law_id, length) in self.automaton.iter_long(text):
+            yield end_index - length + 1, end_index + 1, law_id
+
+    def key(self, index: int) -> bytes:
+        """
+        Returns the utf-8 bytes of the index-th name in the sorted keys.
+        """
+        return self.__strings.raw(self.__keys[index * 2])
+
+
+def _int32s(buffer: memoryview, offset: int, size: int):
+    """
+    Returns the little-endian int32s of the given section, cast in place on a little-endian machine,
+    or copied and swapped into the native order otherwise.
+    """
+    section = buffer[offset:offset + size]
+    if sys.byteorder == 'little':
+        return section.cast('i')
+    values = array('i', bytes(section))
+    values.byteswap()
+    return values
+
+
+class CatalogHandle:
+    """
+    Holds the current catalog of an artifact and swaps in the rebuilt artifact once the file changes.
+    A document should take `handle.current` once and use it to the end, so it is never enriched by two catalogs.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.__lock = threading.Lock()
+        self.__current = Catalog(path)
+        self.__signature = self.__stat()
+        self.__checked_at = time.monotonic()
+
+    @property
+    def current(self) -> Catalog:
+        if time.monotonic() - self.__checked_at >= self.check_interval:
+            self.reload()
+        return self.__current
+
+    def reload(self) -> bool:
+        """
+        Load the artifact if it has changed, the old catalog stays mapped until no document refers to it.
+        :return bool - True if a new catalog is swapped in.
+        """
+        with self.__lock:
+            self.__checked_at = time.monotonic()
+            signature = self.__stat()
+            if signature == self.__signature:
+                return False
+            catalog = Catalog(self.path)
+            # a single assignment, the readers see either the old catalog or the new one.
+            self.__current, self.__signature = catalog, signature
+            return True
+
+    def __stat(self):
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
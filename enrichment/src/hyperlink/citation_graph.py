@@ -0,0 +1,296 @@
+"""
+The citation graph of the enrichment output: the nodes are the documents and the doc meta revisions,
+and an edge from a document to a revision carries the cited article and how many times it is cited.
+
+The edges are stored as CSR arrays (indptr/indices plus the parallel article and count arrays) in both
+directions, so the traversals run over flat arrays in memory even at millions of edges.
+The documents and the revisions share one node table, the key of a document is document_key(doc id), so a doc id
+never collides with a revision key, and a document which is a revision itself, e.g. a regulation citing a law,
+is the node of its revision, so the traversals go through it.
+Re-enriching a document only patches the edges of that document in an overlay, the queries and the export
+merge the overlay in on the fly, and the CSR arrays are rebuilt by compact() once the overlay grows too large.
+"""
+
+import heapq
+import struct
+from array import array
+from collections import Counter, deque
+from itertools import accumulate
+from operator import itemgetter
+from typing import Iterable
+
+from ._io import atomic_write
+from .citation_index import Citation
+
+MAGIC = b'CGRF'
+VERSION = 3
+HEADER = struct.Struct('<4sHHQQQQ')
+# the prefix of the document keys, no revision key starts with it.
+DOCUMENT_PREFIX = 'doc:'
+
+
+def document_key(doc_id) -> str:
+    return f'{DOCUMENT_PREFIX}{doc_id}'
+
+
+class _CSR:
+    """
+    The compressed sparse rows of the edges, the edges of node i are in [indptr[i], indptr[i + 1]).
+    The arrays have fixed item sizes ('q' and 'i') on every platform, so they are saved as they are.
+    """
+
+    def __init__(self, node_count: int, edges: list[tuple[int, int, int, int]] = ()):
+        edges = sorted(edges)
+        self.indices = array('i', map(itemgetter(1), edges))
+        self.articles = array('i', map(itemgetter(2), edges))
+        self.counts = array('i', map(itemgetter(3), edges))
+        degrees = Counter(map(itemgetter(0), edges))
+        self.indptr = array('q', accumulate((degrees.get(node, 0) for node in range(node_count)), initial=0))
+
+    def edges(self, node: int):
+        if node + 1 >= len(self.indptr):
+            return
+        for i in range(self.indptr[node], self.indptr[node + 1]):
+            yield self.indices[i], self.articles[i], self.counts[i]
+
+    def transpose(self, node_count: int) -> "_CSR":
+        """
+        Returns the CSR of the reversed edges, built by a counting sort over the targets in O(E).
+        """
+        indptr, indices, articles, counts = self.indptr, self.indices, self.articles, self.counts
+        degrees = [0] * node_count
+        for target in indices:
+            degrees[target] += 1
+        result = _CSR(0)
+        result.indptr = array('q', accumulate(degrees, initial=0))
+        positions = result.indptr.tolist()
+        result.indices = array('i', bytes(len(indices) * 4))
+        result.articles = array('i', bytes(len(indices) * 4))
+        result.counts = array('i', bytes(len(indices) * 4))
+        for source in range(len(indptr) - 1):
+            for i in range(indptr[source], indptr[source + 1]):
+                target = indices[i]
+                position = positions[target]
+                positions[target] = position + 1
+                result.indices[position] = source
+                result.articles[position] = articles[i]
+                result.counts[position] = counts[i]
+        return result
+
+
+class CitationGraph:
+    # compact the graph once the patched documents exceed this fraction of the documents.
+    compact_ratio = 0.1
+
+    def __init__(self):
+        self.keys: list[str] = []
+        self.__ids: dict[str, int] = {}
+        # the article of an edge, '' means the whole revision is cited.
+        self.articles: list[str] = ['']
+        self.__article_ids: dict[str, int] = {'': 0}
+        self.__out = _CSR(0)
+        self.__in = _CSR(0)
+        # the patched documents and their current edges, they override the edges in the CSR arrays.
+        self.__patched: dict[int, list[tuple[int, int, int]]] = {}
+        self.__patched_in: dict[int, list[tuple[int, int, int]]] = {}
+
+    @classmethod
+    def from_citations(cls, citations: Iterable[Citation], revisions: dict[int, str] = None) -> "CitationGraph":
+        """
+        Build the graph of the given citations in one pass.
+        :params dict[int, str] revisions - the revision keys of the documents which are revisions themselves,
+                                           e.g. {42: '公司登记管理条例'}, their citations start from the revision node.
+        """
+        graph = cls()
+        revisions = revisions or {}
+
+        def source_key(doc_id: int) -> str:
+            return revisions.get(doc_id) or document_key(doc_id)
+
+        counter = Counter(
+            (graph.node_id(source_key(x.doc_id)), graph.node_id(x.key), graph.__article_id(x.article))
+            for x in citations
+        )
+        graph.__build([(source, target, article, count) for (source, target, article), count in counter.items()])
+        return graph
+
+    def node_id(self, key: str) -> int:
+        if (node := self.__ids.get(key)) is None:
+            node = self.__ids[key] = len(self.keys)
+            self.keys.append(key)
+        return node
+
+    def update_document(self, doc_key: str, citations: Iterable[Citation]):
+        """
+        Replace the edges of the given document, the other documents are left untouched.
+        :params str doc_key - the key of the re-enriched document, document_key(doc id) or its revision key.
+        :params Iterable[Citation] citations - all citations of the document.
+        """
+        source = self.node_id(doc_key)
+        counter = Counter((self.node_id(x.key), self.__article_id(x.article)) for x in citations)
+        self.__patched[source] = [(target, article, count) for (target, article), count in counter.items()]
+        self.__patched_in = {}
+        if len(self.__patched) > max(64, self.compact_ratio * len(self.keys)):
+            self.compact()
+
+    def remove_document(self, doc_key: str):
+        if doc_key in self.__ids:
+            self.update_document(doc_key, [])
+
+    def compact(self):
+        """
+        Rebuild the CSR arrays with the patched documents merged in.
+        """
+        self.__out = self.__merged_out()
+        self.__in = self.__out.transpose(len(self.keys))
+        self.__patched = {}
+        self.__patched_in = {}
+
+    def out_edges(self, node: int) -> Iterable[tuple[int, int, int]]:
+        """
+        The (target, article id, count) of edges from the given node.
+        """
+        if (patched := self.__patched.get(node)) is not None:
+            return patched
+        return self.__out.edges(node)
+
+    def in_edges(self, node: int) -> Iterable[tuple[int, int, int]]:
+        """
+        The (source, article id, count) of edges to the given node.
+        """
+        patched = self.__patched
+        if not patched:
+            return self.__in.edges(node)
+        base = (x for x in self.__in.edges(node) if x[0] not in patched)
+        return [*base, *self.__get_patched_in().get(node, ())]
+
+    def citations(self, key: str) -> list[tuple[str, str, int]]:
+        """
+        The (document key, article, count) of the citations of the given revision.
+        """
+        if (node := self.__ids.get(key)) is None:
+            return []
+        return [(self.keys[source], self.articles[article], count) for source, article, count in self.in_edges(node)]
+
+    def most_cited(self, n: int = 10, by_article: bool = True) -> list[tuple[str, str, int]]:
+        """
+        The (revision key, article, count) of the n most cited articles, or revisions if by_article is False.
+        The counts of the CSR arrays are corrected by the patched documents, so no rebuild is needed.
+        """
+        counter: Counter = Counter()
+        out = self.__out
+        if by_article:
+            for target, article, count in zip(out.indices, out.articles, out.counts):
+                counter[(target, article)] += count
+        else:
+            for target, count in zip(out.indices, out.counts):
+                counter[(target, 0)] += count
+        for source, edges in self.__patched.items():
+            for target, article, count in out.edges(source):
+                counter[(target, article if by_article else 0)] -= count
+            for target, article, count in edges:
+                counter[(target, article if by_article else 0)] += count
+        return [
+            (self.keys[target], self.articles[article], count)
+            for (target, article), count in heapq.nlargest(n, counter.items(), key=lambda x: x[1])
+            if count > 0
+        ]
+
+    def affected_by(self, key: str) -> set[str]:
+        """
+        The documents which cite the given revision directly or transitively,
+        e.g. a judgment citing a regulation which cites the revision.
+        """
+        if (node := self.__ids.get(key)) is None:
+            return set()
+        visited = {node}
+        queue = deque([node])
+        while queue:
+            for source, _, _ in self.in_edges(queue.popleft()):
+                if source not in visited:
+                    visited.add(source)
+                    queue.append(source)
+        visited.discard(node)
+        return {self.keys[x] for x in visited}
+
+    def save(self, path: str):
+        """
+        Export the graph as a binary file of the CSR arrays and the key tables, the patched documents are
+        merged into the exported arrays without rebuilding the graph.
+        """
+        keys = '\n'.join(self.keys).encode('utf-8')
+        articles = '\n'.join(self.articles).encode('utf-8')
+        out = self.__merged_out()
+        with atomic_write(path) as file:
+            file.write(HEADER.pack(MAGIC, VERSION, 0, len(self.keys), len(out.indices), len(keys), len(articles)))
+            file.write(keys)
+            file.write(articles)
+            for values in (out.indptr, out.indices, out.articles, out.counts):
+                values.tofile(file)
+
+    @classmethod
+    def load(cls, path: str) -> "CitationGraph":
+        """
+        Load the exported graph, the CSR arrays are read as they are saved, only the reversed edges are rebuilt.
+        """
+        graph = cls()
+        with open(path, 'rb') as file:
+            magic, version, _, node_count, edge_count, keys_size, articles_size = HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"The {path} is not a citation graph of version {VERSION}.")
+            graph.keys = file.read(keys_size).decode('utf-8').split('\n') if node_count else []
+            graph.articles = file.read(articles_size).decode('utf-8').split('\n')
+            out = _CSR(0)
+            out.indptr = array('q')
+            out.indptr.fromfile(file, node_count + 1)
+            for values in (out.indices, out.articles, out.counts):
+                values.fromfile(file, edge_count)
+        graph.__ids = {key: i for i, key in enumerate(graph.keys)}
+        graph.__article_ids = {article: i for i, article in enumerate(graph.articles)}
+        graph.__out = out
+        graph.__in = out.transpose(node_count)
+        return graph
+
+    def __build(self, edges: list[tuple[int, int, int, int]]):
+        self.__out = _CSR(len(self.keys), edges)
+        self.__in = self.__out.transpose(len(self.keys))
+        self.__patched = {}
+        self.__patched_in = {}
+
+    def __merged_out(self) -> _CSR:
+        """
+        Returns the out-edge CSR with the edges of the patched documents in place of their old edges,
+        the rows are concatenated in node order, so nothing is sorted but the patched rows.
+        """
+        out, patched = self.__out, self.__patched
+        if not patched:
+            return out
+        merged = _CSR(0)
+        indptr = merged.indptr = array('q', [0])
+        for source in range(len(self.keys)):
+            if (edges := patched.get(source)) is not None:
+                for target, article, count in sorted(edges):
+                    merged.indices.append(target)
+                    merged.articles.append(article)
+                    merged.counts.append(count)
+            elif source + 1 < len(out.indptr):
+                start, end = out.indptr[source], out.indptr[source + 1]
+                merged.indices += out.indices[start:end]
+                merged.articles += out.articles[start:end]
+                merged.counts += out.counts[start:end]
+            indptr.append(len(merged.indices))
+        return merged
+
+    def __article_id(self, article: str) -> int:
+        article = article or ''
+        if (article_id := self.__article_ids.get(article)) is None:
+            article_id = self.__article_ids[article] = len(self.articles)
+            self.articles.append(article)
+        return article_id
+
+    def __get_patched_in(self) -> dict[int, list[tuple[int, int, int]]]:
+        if not self.__patched_in:
+            for source, edges in self.__patched.items():
+                for target, article, count in edges:
+                    self.__patched_in.setdefault(target, []).append((source, article, count))
+        return self.__patched_in
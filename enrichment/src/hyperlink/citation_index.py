@@ -0,0 +1,373 @@
+"""
+An on-disk inverted index of the citations produced by the enrichment, it answers questions like
+"which documents cite 公司法(2019修正) 第十六条" without re-running the extraction over the corpus.
+
+The index is a directory of immutable segments, each commit of new documents appends a new segment.
+A segment is laid out as:
+    header     - magic, version, term count and the offsets of the sections below.
+    directory  - one fixed-width entry per term sorted by term: term offset/length, postings offset/length, doc count.
+    terms      - the utf-8 terms, a term is "<anchor type code>\x1f<doc meta key>\x1f<article no>".
+    postings   - per term, the (doc id, start index, end index) sorted and delta-encoded as varints.
+Segments are memory-mapped, a lookup is a binary search over the fixed-width directory of each segment.
+A segment is named by the range of the sequences it covers, 00000007.cidx for an appended segment and
+00000000-00000007.cidx for the merge of the segments 0 to 7, so a reader skips the merged segments
+which are still on disk until the compaction removes them.
+The writers of a directory take an exclusive lock file to pick the next sequence and write its segment,
+so two processes never write the same segment, and a compaction never covers a sequence still being written.
+"""
+
+import os
+import mmap
+import fcntl
+import heapq
+import shutil
+import struct
+import bisect
+import tempfile
+from itertools import groupby
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from ._io import KeyView, atomic_write
+from .anchor_extractor import AnchorType
+
+MAGIC = b'CIDX'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQQ')
+DIRECTORY_ENTRY = struct.Struct('<QIQII')
+SEGMENT_SUFFIX = '.cidx'
+# the lock file which serializes the writers of a directory across processes.
+LOCK_NAME = 'LOCK'
+
+
+@dataclass(frozen=True)
+class Citation:
+    type: AnchorType
+    key: str
+    article: str
+    doc_id: int
+    start_index: int
+    end_index: int
+
+
+@dataclass(frozen=True, order=True)
+class Posting:
+    doc_id: int
+    start_index: int
+    end_index: int
+
+
+def make_term(anchor_type: AnchorType, key: str, article: str = '') -> bytes:
+    return f'{anchor_type.value}\x1f{key}\x1f{article or ""}'.encode('utf-8')
+
+
+def encode_varint(value: int, out: bytearray):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varints(buffer, start: int, end: int) -> Iterator[int]:
+    value = shift = 0
+    for index in range(start, end):
+        byte = buffer[index]
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value = shift = 0
+
+
+def encode_postings(postings: list[tuple[int, int, int]]) -> bytes:
+    """
+    Encode the sorted postings, the doc id is delta-encoded against the previous posting,
+    the start index against the previous start index within the same document, and the end index as a length.
+    """
+    out = bytearray()
+    previous_doc_id = previous_start = 0
+    for doc_id, start_index, end_index in postings:
+        if doc_id != previous_doc_id:
+            previous_start = 0
+        encode_varint(doc_id - previous_doc_id, out)
+        encode_varint(start_index - previous_start, out)
+        encode_varint(end_index - start_index, out)
+        previous_doc_id, previous_start = doc_id, start_index
+    return bytes(out)
+
+
+def decode_postings(buffer, start: int, end: int) -> list[Posting]:
+    postings = []
+    values = decode_varints(buffer, start, end)
+    doc_id = start_index = 0
+    for doc_delta, start_delta, length in zip(values, values, values):
+        if doc_delta:
+            doc_id += doc_delta
+            start_index = 0
+        start_index += start_delta
+        postings.append(Posting(doc_id, start_index, start_index + length))
+    return postings
+
+
+class SegmentWriter:
+    """
+    Writes a segment from the terms added in sorted order, the postings are spilled to a temporary file
+    as they are added, so only the directory and the terms are held in memory.
+    The file is written aside and renamed into place on close, so the readers never see a partial segment.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__directory = bytearray()
+        self.__terms_blob = bytearray()
+        self.__postings_length = 0
+        self.__postings = tempfile.TemporaryFile(dir=os.path.dirname(path) or None)
+        self.__last_term = None
+
+    def add(self, term: bytes, postings: list[tuple[int, int, int]]):
+        """
+        Add a term greater than the terms added before, with its sorted and unique postings.
+        """
+        if self.__last_term is not None and term <= self.__last_term:
+            raise ValueError(f"The terms must be added in sorted order, {term!r} follows {self.__last_term!r}.")
+        self.__last_term = term
+        encoded = encode_postings(postings)
+        doc_count = len({x[0] for x in postings})
+        self.__directory += DIRECTORY_ENTRY.pack(
+            len(self.__terms_blob), len(term), self.__postings_length, len(encoded), doc_count
+        )
+        self.__terms_blob += term
+        self.__postings.write(encoded)
+        self.__postings_length += len(encoded)
+
+    def close(self):
+        directory, terms_blob = self.__directory, self.__terms_blob
+        terms_offset = HEADER.size + len(directory)
+        postings_offset = terms_offset + len(terms_blob)
+        with self.__postings, atomic_write(self.path) as file:
+            file.write(HEADER.pack(MAGIC, VERSION, 0, len(directory) // DIRECTORY_ENTRY.size, terms_offset, postings_offset))
+            file.write(directory)
+            file.write(terms_blob)
+            self.__postings.seek(0)
+            shutil.copyfileobj(self.__postings, file)
+
+
+def write_segment(path: str, citations: Iterable[Citation]):
+    """
+    Write the given citations into a new segment.
+    """
+    groups: dict[bytes, list[tuple[int, int, int]]] = {}
+    for citation in citations:
+        groups.setdefault(make_term(citation.type, citation.key, citation.article), []).append(
+            (citation.doc_id, citation.start_index, citation.end_index)
+        )
+
+    writer = SegmentWriter(path)
+    for term in sorted(groups):
+        writer.add(term, sorted(set(groups[term])))
+    writer.close()
+
+
+def merge_segments(path: str, segments: list["Segment"]):
+    """
+    Merge the given segments into a new segment, the sorted terms of the segments are merged term by term,
+    so only the postings of one term are held in memory at a time.
+    """
+    writer = SegmentWriter(path)
+    terms = heapq.merge(*map(_terms, segments), key=lambda x: x[0])
+    for term, group in groupby(terms, key=lambda x: x[0]):
+        postings = set()
+        for _, segment, index in group:
+            postings.update((x.doc_id, x.start_index, x.end_index) for x in segment.postings(index))
+        writer.add(term, sorted(postings))
+    writer.close()
+
+
+def _terms(segment: "Segment") -> Iterator[tuple[bytes, "Segment", int]]:
+    for index in range(len(segment)):
+        yield segment.term(index), segment, index
+
+
+def _sequences(path: str) -> tuple[int, int]:
+    """
+    Returns the first and the last sequence which the segment covers.
+    """
+    first, _, last = os.path.basename(path)[:-len(SEGMENT_SUFFIX)].partition('-')
+    return int(first), int(last or first)
+
+
+class Segment:
+    """
+    A memory-mapped segment of the citation index.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.__mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.term_count, self.__terms_offset, self.__postings_offset = HEADER.unpack_from(
+            self.__mmap, 0
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"The {path} is not a citation index segment of version {VERSION}.")
+
+    def __len__(self):
+        return self.term_count
+
+    def term(self, index: int) -> bytes:
+        term_offset, term_length, *_ = DIRECTORY_ENTRY.unpack_from(self.__mmap, HEADER.size + index * DIRECTORY_ENTRY.size)
+        start = self.__terms_offset + term_offset
+        return self.__mmap[start:start + term_length]
+
+    def find(self, term: bytes) -> int:
+        """
+        Returns the directory index of the given term, or -1 if there is no such term.
+        """
+        index = bisect.bisect_left(KeyView(self.term_count, self.term), term)
+        if index < self.term_count and self.term(index) == term:
+            return index
+        return -1
+
+    def postings(self, index: int) -> list[Posting]:
+        _, _, postings_offset, postings_length, _ = DIRECTORY_ENTRY.unpack_from(
+            self.__mmap, HEADER.size + index * DIRECTORY_ENTRY.size
+        )
+        start = self.__postings_offset + postings_offset
+        return decode_postings(self.__mmap, start, start + postings_length)
+
+    def doc_count(self, index: int) -> int:
+        return DIRECTORY_ENTRY.unpack_from(self.__mmap, HEADER.size + index * DIRECTORY_ENTRY.size)[4]
+
+    def close(self):
+        self.__mmap.close()
+
+
+class CitationIndex:
+    """
+    The reader and the incremental writer of a citation index directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.segments: list[Segment] = []
+        self.refresh()
+
+    def refresh(self):
+        """
+        Open the segments which are appended since the last refresh, and close the segments which are
+        merged or removed since, e.g. by the compaction of another instance.
+        """
+        opened = {x.path: x for x in self.segments}
+        while True:
+            live = self.__segment_paths()
+            segments = []
+            try:
+                for path in live:
+                    segments.append(opened.get(path) or Segment(path))
+                break
+            except FileNotFoundError:
+                # a segment is removed by a compaction in between, the merged segment is listed next time.
+                for segment in segments:
+                    if segment.path not in opened:
+                        segment.close()
+        for path, segment in opened.items():
+            if path not in live:
+                segment.close()
+        self.segments = segments
+
+    def append(self, citations: Iterable[Citation]) -> str:
+        """
+        Append the citations of new documents as a new segment.
+        :return str - the path of the new segment.
+        """
+        with self.__lock():
+            path = os.path.join(self.directory, f'{self.__next_sequence():08d}{SEGMENT_SUFFIX}')
+            write_segment(path, citations)
+        self.refresh()
+        return path
+
+    def lookup(self, anchor_type: AnchorType, key: str, article: str = '') -> list[Posting]:
+        """
+        Find the citations of the given doc meta key and article.
+        :return list[Posting] - the postings of all segments, ordered by doc id and start index.
+        """
+        term = make_term(anchor_type, key, article)
+        result = []
+        for segment in self.segments:
+            if (index := segment.find(term)) >= 0:
+                result += segment.postings(index)
+        if len(self.segments) > 1:
+            result.sort()
+        return result
+
+    def documents(self, anchor_type: AnchorType, key: str, article: str = '') -> list[int]:
+        """
+        Find the ids of documents which cite the given doc meta key and article.
+        """
+        return sorted({x.doc_id for x in self.lookup(anchor_type, key, article)})
+
+    def compact(self):
+        """
+        Merge all segments into one, the merged segment is written before the merged ones are removed,
+        and it covers their sequences, so a reader refreshing in between never sees a posting twice.
+        """
+        # the appends are serialized by the lock, so every sequence up to the last listed one is written.
+        with self.__lock():
+            self.refresh()
+        if len(self.segments) < 2:
+            return
+        first, last = _sequences(self.segments[0].path)[0], _sequences(self.segments[-1].path)[1]
+        path = os.path.join(self.directory, f'{first:08d}-{last:08d}{SEGMENT_SUFFIX}')
+        merge_segments(path, self.segments)
+        self.refresh()
+        for covered in self.__all_segment_paths():
+            if covered != path and first <= _sequences(covered)[0] and _sequences(covered)[1] <= last:
+                try:
+                    os.remove(covered)
+                except FileNotFoundError:
+                    # removed by the compaction of another instance.
+                    pass
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @contextmanager
+    def __lock(self):
+        """
+        Hold the exclusive lock of the directory, the lock is released by the system if the process dies.
+        """
+        with open(os.path.join(self.directory, LOCK_NAME), 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def __all_segment_paths(self) -> list[str]:
+        return [os.path.join(self.directory, x) for x in os.listdir(self.directory) if x.endswith(SEGMENT_SUFFIX)]
+
+    def __segment_paths(self) -> list[str]:
+        """
+        Returns the paths of the live segments ordered by sequence, a segment covered by a merged one is skipped.
+        """
+        live = []
+        covered = -1
+        for path in sorted(self.__all_segment_paths(), key=lambda x: (_sequences(x)[0], -_sequences(x)[1])):
+            if _sequences(path)[1] > covered:
+                live.append(path)
+                covered = _sequences(path)[1]
+        return live
+
+    def __next_sequence(self) -> int:
+        return max((_sequences(x)[1] for x in self.__all_segment_paths()), default=-1) + 1
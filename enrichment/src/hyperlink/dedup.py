@@ -0,0 +1,323 @@
+"""
+The near-duplicate detection before the enrichment, a reposted copy of a judgment or a regulation reuses
+the anchors of the copy enriched before it instead of being enriched from scratch.
+
+The content of a document, i.e. the text of its text nodes, is fingerprinted twice before the normalization:
+    digest     - the blake2b digest of the content, which finds the exact duplicates.
+    signature  - a one-permutation MinHash over the clauses of the content, so the signature costs a regex
+                 split and one crc32 per distinct clause rather than one hash per character,
+                 and an edit changes the shingles of its own clause only.
+The duplicates are detected on the content rather than on the normalized text, because the diff and
+the reused anchors are in the offsets of the content, and a duplicate is never normalized at all.
+The signatures are banded into an LSH index, the candidates which share a band are verified by the
+estimated Jaccard similarity, then the sentences of the two contents are diffed: the anchors within the
+equal sentences are shifted, and only the changed sentences are extracted again.
+The titles, the abbreviation definitions and the references to them are resolved across the whole document,
+so a diff whose changed sentences hold any of them falls back to the full enrichment, e.g. removing the
+sentence which defines 《公司法》 changes the anchors of every sentence which uses it.
+"""
+
+import re
+import zlib
+import bisect
+import hashlib
+from array import array
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Callable
+
+from .anchor_extractor import Anchor, AnchorType
+from .metrics import Metrics, NULL_METRICS
+from .normalizer import NormalizedText
+from .trial_progress import CaseNumberAnchor, TrialProgressExtractor
+from .xml_text_helper import SENTENCE_SPLITTER, extract_normalized_anchors
+
+SHINGLE_SIZE = 8
+BINS = 64
+BANDS = 8
+ROWS = BINS // BANDS
+EMPTY = 0xFFFFFFFF
+# the clauses between the punctuations are the shingles, the texts with too few clauses fall back to
+# the shingles of SHINGLE_SIZE characters.
+CLAUSE_PATTERN = re.compile(r'[，。；：、！？,.;:!?\n]')
+MIN_CLAUSES = BINS
+MAX_DIFFS = 3
+# a changed sentence with a title or an abbreviation definition changes the resolution of the other sentences.
+CONTEXT_MARKERS = ('《', '简称')
+# the anchors resolved against the rest of the document.
+CONTEXT_TYPES = (AnchorType.ABBREVIATION, AnchorType.SELF_REF)
+
+
+def shingles(text: str) -> set[str]:
+    clauses = set(CLAUSE_PATTERN.split(text))
+    clauses.discard('')
+    if len(clauses) < MIN_CLAUSES:
+        clauses.update(text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1)))
+    return clauses
+
+
+def minhash(text: str) -> array:
+    """
+    Returns the one-permutation MinHash of the text: the low bits of the hash of a shingle choose its bin,
+    and each bin keeps the minimum hash, the empty bins borrow the value of the next non-empty bin.
+    """
+    bins = array('I', [EMPTY]) * BINS
+    mask = BINS - 1
+    crc32 = zlib.crc32
+    for shingle in shingles(text):
+        value = crc32(shingle.encode('utf-8'))
+        index = value & mask
+        if value < bins[index]:
+            bins[index] = value
+    if EMPTY in bins and any(x != EMPTY for x in bins):
+        original = bins.tolist()
+        for i in range(BINS):
+            j = i
+            while original[j % BINS] == EMPTY:
+                j += 1
+            # the borrowed value is salted by the distance, so two texts agree on an empty bin only by chance.
+            bins[i] = original[j % BINS] ^ (j - i)
+    return bins
+
+
+def similarity(a: array, b: array) -> float:
+    """
+    The Jaccard similarity estimated by the fraction of the equal bins.
+    """
+    return sum(x == y for x, y in zip(a, b)) / BINS
+
+
+def _segments(text: str) -> list[tuple[int, int]]:
+    # the sentences cover the whole text, the characters between two sentences join the former.
+    starts = [start for start, _ in SENTENCE_SPLITTER.spans(text)] or [0]
+    starts[0] = 0
+    return list(zip(starts, [*starts[1:], len(text)]))
+
+
+def _shift_anchors(anchors: list[Anchor], shift: Callable[[Anchor], int]) -> list[Anchor]:
+    """
+    Shift the anchors in place by their offsets, the anchors whose offset is None are dropped,
+    and so are the parents and targets referring to them.
+    """
+    kept = []
+    for anchor in anchors:
+        if (offset := shift(anchor)) is not None:
+            anchor.start_index += offset
+            anchor.end_index += offset
+            kept.append(anchor)
+    if len(kept) < len(anchors):
+        dropped = {id(x) for x in anchors}.difference(map(id, kept))
+        for anchor in kept:
+            for name in ('parent', 'target'):
+                if id(getattr(anchor, name)) in dropped:
+                    setattr(anchor, name, None)
+    return kept
+
+
+def _clone_anchors(anchors: list[Anchor]) -> list[Anchor]:
+    """
+    Clone the anchors with their parents and targets, the case numbers are frozen and shared.
+    A clone copies the __dict__ of the anchor, which is several times faster than copy.copy or pickle.
+    """
+    new = object.__new__
+    clones: dict[int, Anchor] = {}
+    result = []
+    for anchor in anchors:
+        clone = new(anchor.__class__)
+        clone.__dict__.update(anchor.__dict__)
+        clones[id(anchor)] = clone
+        result.append(clone)
+    for clone in result:
+        state = clone.__dict__
+        for name in ('parent', 'target'):
+            if (related := state.get(name)) is not None:
+                if (related_clone := clones.get(id(related))) is None:
+                    # the targets out of the anchors, e.g. the document title which 本法 refers to.
+                    related_clone = clones[id(related)] = new(related.__class__)
+                    related_clone.__dict__.update(related.__dict__)
+                state[name] = related_clone
+    return result
+
+
+class _Entry:
+    """
+    An enriched document, its anchors are cloned out, so a near duplicate shifting them never moves the kept ones.
+    """
+    __slots__ = ('content', 'kept', 'signature')
+
+    def __init__(self, content: str, anchors: list[Anchor], signature: array):
+        self.content = content
+        self.kept = anchors
+        self.signature = signature
+
+    @property
+    def anchors(self) -> list[Anchor]:
+        return _clone_anchors(self.kept)
+
+
+class Deduplicator:
+    """
+    A drop-in replacement of extract_anchors which reuses the anchors of the exact and near-exact duplicates,
+        dedup = Deduplicator()
+        extract_anchor_offsets(source, extract=dedup)
+    The enriched documents are kept up to capacity, the oldest are evicted first. The anchors of an enriched
+    document are kept as they are returned rather than cloned, so the caller must not move them,
+    the anchors returned for a duplicate are clones.
+    """
+
+    def __init__(
+            self,
+            threshold: float = 0.9,
+            max_changed_ratio: float = 0.1,
+            capacity: int = 10_000,
+            extract: Callable[[str, Metrics], list[Anchor]] = extract_normalized_anchors,
+    ):
+        self.threshold = threshold
+        self.max_changed_ratio = max_changed_ratio
+        self.capacity = capacity
+        self.extract = extract
+        self.stats = {'documents': 0, 'exact': 0, 'near': 0, 'enriched': 0}
+        self.__entries: OrderedDict[bytes, _Entry] = OrderedDict()
+        self.__buckets: dict[tuple[int, bytes], list[bytes]] = {}
+
+    @property
+    def skipped_ratio(self) -> float:
+        """
+        The fraction of documents which reused the anchors of a duplicate.
+        """
+        documents = self.stats['documents']
+        return (self.stats['exact'] + self.stats['near']) / documents if documents else 0.0
+
+    def __call__(self, content: str, metrics: Metrics = NULL_METRICS) -> list[Anchor]:
+        """
+        Returns the anchors of the content, the same as extract_anchors(content).
+        """
+        self.stats['documents'] += 1
+        metrics.count('chars', len(content))
+        with metrics.stage('dedup'):
+            # a copy with the same content is served before the normalization.
+            digest = hashlib.blake2b(content.encode('utf-8'), digest_size=16).digest()
+            if (entry := self.__entries.get(digest)) is not None:
+                self.stats['exact'] += 1
+                metrics.count('duplicates_exact')
+                anchors = entry.anchors
+                metrics.count('anchors', len(anchors))
+                return anchors
+
+            signature = minhash(content)
+            candidates = [x for x in self.__candidates(signature) if similarity(signature, x.signature) >= self.threshold]
+        # the most similar candidates are diffed first, a diff costs more than the extraction of its changes.
+        candidates.sort(key=lambda x: similarity(signature, x.signature), reverse=True)
+        for candidate in candidates[:MAX_DIFFS]:
+            anchors = self.__rebase(candidate, content, metrics)
+            if anchors is not None:
+                self.stats['near'] += 1
+                metrics.count('duplicates_near')
+                metrics.count('anchors', len(anchors))
+                return anchors
+
+        with metrics.stage('normalize'):
+            normalized = NormalizedText(content)
+        self.stats['enriched'] += 1
+        anchors = self.extract(normalized.text, metrics)
+        with metrics.stage('rebase'):
+            anchors = normalized.rebase(anchors)
+        metrics.count('anchors', len(anchors))
+        self.__add(digest, _Entry(content, anchors, signature))
+        return anchors
+
+    def __extract(self, content: str, metrics: Metrics) -> list[Anchor]:
+        normalized = NormalizedText(content)
+        return normalized.rebase(self.extract(normalized.text, metrics))
+
+    def __rebase(self, entry: _Entry, content: str, metrics: Metrics) -> list[Anchor]:
+        """
+        Shift the anchors of the equal sentences and extract the changed sentences again,
+        or returns None if the changed sentences exceed max_changed_ratio of the content,
+        or if they hold anything resolved across the document, i.e. a title, an abbreviation definition,
+        an abbreviation or a self-reference.
+        """
+        old_segments, new_segments = _segments(entry.content), _segments(content)
+        matcher = SequenceMatcher(
+            None,
+            [entry.content[start:end] for start, end in old_segments],
+            [content[start:end] for start, end in new_segments],
+            autojunk=False,
+        )
+        # the (old start, old end, shift) of the equal ranges, the changed texts on both sides,
+        # and the (start, end) of the changed ranges of the content.
+        equal_ranges, changed_texts, changed_ranges = [], [], []
+        changed = 0
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                start = old_segments[i1][0]
+                equal_ranges.append((start, old_segments[i2 - 1][1], new_segments[j1][0] - start))
+                continue
+            if i2 > i1:
+                changed_texts.append(entry.content[old_segments[i1][0]:old_segments[i2 - 1][1]])
+            if j2 > j1:
+                changed_ranges.append((new_segments[j1][0], new_segments[j2 - 1][1]))
+                changed_texts.append(content[changed_ranges[-1][0]:changed_ranges[-1][1]])
+                changed += changed_ranges[-1][1] - changed_ranges[-1][0]
+        if changed > self.max_changed_ratio * len(content):
+            return None
+        if any(marker in text for text in changed_texts for marker in CONTEXT_MARKERS):
+            return None
+        # the unbracketed abbreviations, e.g. “公司法” defined in an equal sentence and used in a changed one.
+        words = {x.value for x in entry.kept if x.type == AnchorType.ABBREVIATION and not x.value.startswith('《')}
+        if words and any(word in text for text in changed_texts for word in words):
+            return None
+
+        extracted = []
+        for start, end in changed_ranges:
+            changed_anchors = self.__extract(content[start:end], metrics)
+            if any(x.type in CONTEXT_TYPES for x in changed_anchors):
+                return None
+            extracted += _shift_anchors(changed_anchors, lambda _, offset=start: offset)
+
+        starts = [x[0] for x in equal_ranges]
+
+        def shift(anchor: Anchor):
+            index = bisect.bisect_right(starts, anchor.start_index) - 1
+            if index >= 0 and anchor.end_index <= equal_ranges[index][1]:
+                return equal_ranges[index][2]
+            return None
+
+        anchors = entry.anchors
+        resolved = {id(x) for x in anchors if x.target is not None}
+        # the abbreviations and self-references whose targets are dropped with the changed sentences are dropped too.
+        anchors = [
+            x for x in _shift_anchors(anchors, shift)
+            if x.target is not None or x.type not in CONTEXT_TYPES or id(x) not in resolved
+        ]
+        anchors += extracted
+        anchors.sort(key=lambda x: (x.start_index, x.end_index))
+        # the trial-progress chain spans the whole document, so it is linked again over the merged anchors.
+        TrialProgressExtractor.link([x for x in anchors if isinstance(x, CaseNumberAnchor)])
+        metrics.count('chars_reextracted', changed)
+        return anchors
+
+    def __candidates(self, signature: array):
+        seen = set()
+        for band, key in self.__bands(signature):
+            for digest in self.__buckets.get((band, key), ()):
+                if digest not in seen:
+                    seen.add(digest)
+                    yield self.__entries[digest]
+
+    def __add(self, digest: bytes, entry: _Entry):
+        if len(self.__entries) >= self.capacity:
+            evicted_digest, evicted = self.__entries.popitem(last=False)
+            for bucket in self.__bands(evicted.signature):
+                digests = self.__buckets[bucket]
+                digests.remove(evicted_digest)
+                if not digests:
+                    del self.__buckets[bucket]
+        self.__entries[digest] = entry
+        for bucket in self.__bands(entry.signature):
+            self.__buckets.setdefault(bucket, []).append(digest)
+
+    @staticmethod
+    def __bands(signature: array):
+        for band in range(BANDS):
+            yield band, signature[band * ROWS:(band + 1) * ROWS].tobytes()
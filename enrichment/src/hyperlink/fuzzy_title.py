@@ -0,0 +1,198 @@
+"""
+The approximate matching of the bracketed titles which find no exact match in the law catalog,
+e.g. 《中华人民共和国公司去》 in a scanned judgment is resolved to 中华人民共和国公司法.
+
+The candidates are shortlisted by a character bigram index over the catalog names, then verified by a
+bounded edit distance, the results are cached per distinct title, and a per-document time budget
+guarantees the fuzzy matching never dominates the throughput.
+"""
+
+import time
+import heapq
+from array import array
+from collections import Counter
+from typing import Callable, Iterable
+
+from .anchor_extractor import Anchor, AnchorType
+
+
+def bigrams(value: str) -> set[str]:
+    return {value[i:i + 2] for i in range(len(value) - 1)} if len(value) > 1 else {value}
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Returns the levenshtein distance between a and b if it is not greater than max_distance, otherwise -1.
+    Only the diagonal band of width 2 * max_distance + 1 is computed, and it gives up as soon as a row exceeds the bound.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return -1
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+
+    beyond = max_distance + 1
+    previous = [j if j <= max_distance else beyond for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low, high = max(1, i - max_distance), min(len(b), i + max_distance)
+        current = [beyond] * (len(b) + 1)
+        current[0] = i if i <= max_distance else beyond
+        char = a[i - 1]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char != b[j - 1])
+            current[j] = min(cost, previous[j] + 1, current[j - 1] + 1, beyond)
+        if min(current[low - 1:high + 1]) > max_distance:
+            return -1
+        previous = current
+    return previous[len(b)] if previous[len(b)] <= max_distance else -1
+
+
+class NGramIndex:
+    """
+    An inverted index from the character bigrams to the ids of the catalog names.
+    """
+
+    # the bigrams shared by more than this fraction of names (e.g. 中华, 人民) are too common to shortlist.
+    common_ratio = 0.02
+    # the postings counted per query, in multiples of the longest posting list of a rare bigram.
+    scan_ratio = 4
+
+    def __init__(self, names: Iterable[str]):
+        self.names: list[str] = list(dict.fromkeys(names))
+        postings: dict[str, list[int]] = {}
+        for name_id, name in enumerate(self.names):
+            for gram in bigrams(name):
+                postings.setdefault(gram, []).append(name_id)
+        self.__postings = {k: array('l', v) for k, v in postings.items()}
+        self.__max_postings = max(16, int(len(self.names) * self.common_ratio))
+        self.__max_scanned = self.scan_ratio * self.__max_postings
+
+    def shortlist(
+            self,
+            query: str,
+            limit: int,
+            max_missing: int = 0,
+            deadline: float = None,
+            clock: Callable[[], float] = time.perf_counter,
+    ) -> list[str]:
+        """
+        Returns at most limit names which share the most bigrams with the query,
+        the names missing more than max_missing of the rare bigrams of the query are left out.
+        Only the rare bigrams are counted, the rarest first, and the counting stops once max_scanned postings
+        are counted or the deadline passes, so a query costs O(max_scanned) at most. A query without any rare
+        bigram, e.g. 中华人民共和国, shortlists nothing, because the common bigrams cannot tell the names apart.
+        The deadline is compared with the given clock.
+        """
+        rare = sorted(
+            (x for x in (self.__postings.get(gram, ()) for gram in bigrams(query)) if len(x) <= self.__max_postings),
+            key=len,
+        )
+        counter = Counter()
+        counted = scanned = 0
+        for name_ids in rare:
+            if counted and (scanned + len(name_ids) > self.__max_scanned
+                            or deadline is not None and clock() > deadline):
+                break
+            counter.update(name_ids)
+            counted += 1
+            scanned += len(name_ids)
+        if not counted:
+            return []
+        min_shared = max(1, counted - max_missing)
+        candidates = ((count, name_id) for name_id, count in counter.items() if count >= min_shared)
+        return [self.names[name_id] for _, name_id in heapq.nlargest(limit, candidates)]
+
+
+class FuzzyTitleResolver:
+    """
+    Resolves the bracketed titles without an exact match to the nearest catalog name within a bounded edit distance.
+    """
+
+    def __init__(
+            self,
+            names: Iterable[str],
+            max_distance: int = 2,
+            shortlist_size: int = 10,
+            budget_seconds: float = 0.005,
+            cache_size: int = 100_000,
+            clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.index = NGramIndex(names)
+        self.exact_names = frozenset(self.index.names)
+        self.max_distance = max_distance
+        self.shortlist_size = shortlist_size
+        self.budget_seconds = budget_seconds
+        self.cache_size = cache_size
+        # the clock of the time budget, in seconds.
+        self.clock = clock
+        self.__cache: dict[str, str] = {}
+
+    def allowed_distance(self, title: str) -> int:
+        # a short title such as 刑法 must not be matched to 民法, one edit is allowed per four characters.
+        return min(self.max_distance, len(title) // 4)
+
+    def match(self, title: str) -> str:
+        """
+        Returns the catalog name nearest to the given title, or None if there is no such name within the allowed distance.
+        """
+        return self.__match(title)[0]
+
+    def resolve(self, anchors: list[Anchor]) -> int:
+        """
+        Resolve the title anchors of a document which find no exact match, the resolved catalog name is set as
+        the target of each anchor. The cached titles are always resolved, but the titles which need a fuzzy match
+        are skipped once the time budget of the document is spent, and a match which is still running at the
+        deadline gives up as well, so the budget bounds the whole document rather than each match.
+        :return int - the number of titles skipped because of the time budget.
+        """
+        clock = self.clock
+        deadline = clock() + self.budget_seconds
+        skipped = 0
+        for anchor in anchors:
+            if anchor.type != AnchorType.TITLE or anchor.target is not None:
+                continue
+            title = anchor.value[1:-1]
+            if title in self.exact_names:
+                continue
+            if title not in self.__cache and clock() > deadline:
+                skipped += 1
+                continue
+            name, complete = self.__match(title, deadline)
+            if not complete:
+                skipped += 1
+            elif name:
+                anchor.target = Anchor(f'《{name}》', 0, 0, AnchorType.TITLE)
+        return skipped
+
+    def __match(self, title: str, deadline: float = None) -> tuple[str, bool]:
+        """
+        Returns the nearest catalog name and whether the match completed before the deadline,
+        a match cut short by the deadline is not cached.
+        """
+        if title in self.exact_names:
+            return title, True
+        if title in self.__cache:
+            return self.__cache[title], True
+
+        result = None
+        max_distance = self.allowed_distance(title)
+        if max_distance:
+            best = max_distance + 1
+            # every edit breaks at most two bigrams.
+            for name in self.index.shortlist(title, self.shortlist_size, 2 * max_distance, deadline, self.clock):
+                if deadline is not None and self.clock() > deadline:
+                    return None, False
+                distance = bounded_edit_distance(title, name, best - 1)
+                if distance >= 0:
+                    result, best = name, distance
+                    if distance == 1:
+                        break
+            if deadline is not None and self.clock() > deadline:
+                # the shortlist may be cut short by the deadline, so its result is not cached either.
+                return result, False
+
+        if len(self.__cache) >= self.cache_size:
+            self.__cache.clear()
+        self.__cache[title] = result
+        return result, True
@@ -0,0 +1,250 @@
+"""
+The per-stage instrumentation of the enrichment: the timers of the stages (parse, collect, normalize, split,
+extract, resolve, rebase, map, write), the counters of documents, bytes, nodes and anchors,
+and the capture of slow documents.
+
+The stages are timed by passing a Metrics to the extract functions, e.g.
+    metrics = Metrics()
+    extract_anchor_offsets(source, metrics=metrics)
+    metrics.write_textfile('/var/lib/node_exporter/enrichment.prom')
+Without a Metrics the functions use NULL_METRICS, whose hooks do nothing.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import cProfile
+from collections import Counter
+
+from ._io import atomic_write
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    """
+    The timers and counters of the stages and the sampled gauges, a Metrics is picklable and can be merged,
+    so the metrics of the worker processes are collected into one.
+    """
+    # False for the metrics which record nothing, so the callers skip computing what would be recorded.
+    enabled = True
+
+    def __init__(self):
+        # the [count, total seconds, max seconds] of each stage.
+        self.timings: dict[str, list] = {}
+        self.counters: Counter = Counter()
+        # the [count, total, max] of the sampled values of each gauge, e.g. the depth of a queue.
+        self.samples: dict[str, list] = {}
+
+    def stage(self, name: str) -> _Timer:
+        """
+        Returns a context manager which times the given stage.
+        """
+        return _Timer(self, name)
+
+    def observe(self, name: str, seconds: float):
+        if (timing := self.timings.get(name)) is None:
+            self.timings[name] = [1, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            if seconds > timing[2]:
+                timing[2] = seconds
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def sample(self, name: str, value: float):
+        if (samples := self.samples.get(name)) is None:
+            self.samples[name] = [1, value, value]
+        else:
+            samples[0] += 1
+            samples[1] += value
+            if value > samples[2]:
+                samples[2] = value
+
+    def merge(self, other: "Metrics"):
+        for mine, theirs in ((self.timings, other.timings), (self.samples, other.samples)):
+            for name, (count, total, maximum) in theirs.items():
+                if (values := mine.get(name)) is None:
+                    mine[name] = [count, total, maximum]
+                else:
+                    values[0] += count
+                    values[1] += total
+                    values[2] = max(values[2], maximum)
+        self.counters.update(other.counters)
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            'stages': {
+                name: {'count': count, 'seconds': total, 'max_seconds': maximum}
+                for name, (count, total, maximum) in self.timings.items()
+            },
+            'counters': dict(self.counters),
+            'samples': {
+                name: {'count': count, 'mean': total / count, 'max': maximum}
+                for name, (count, total, maximum) in self.samples.items()
+            },
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = 'enrichment') -> str:
+        """
+        Format the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        if self.timings:
+            lines += [
+                f'# HELP {prefix}_stage_seconds The time spent in each stage.',
+                f'# TYPE {prefix}_stage_seconds summary',
+            ]
+            for name, (count, total, _) in sorted(self.timings.items()):
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {total:.9f}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {count}')
+            lines.append(f'# TYPE {prefix}_stage_max_seconds gauge')
+            for name, (_, _, maximum) in sorted(self.timings.items()):
+                lines.append(f'{prefix}_stage_max_seconds{{stage="{name}"}} {maximum:.9f}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            lines.append(f'{prefix}_{name}_total {value}')
+        for name, (count, total, maximum) in sorted(self.samples.items()):
+            lines.append(f'# TYPE {prefix}_{name} gauge')
+            lines.append(f'{prefix}_{name}{{stat="mean"}} {total / count:g}')
+            lines.append(f'{prefix}_{name}{{stat="max"}} {maximum:g}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str):
+        """
+        Write the metrics aside and rename them into place, so a collector never reads a partial file.
+        The file is in the Prometheus format if its extension is .prom, otherwise in JSON.
+        """
+        content = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with atomic_write(path, 'w', fsync=False) as file:
+            file.write(content)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class NullMetrics(Metrics):
+    """
+    The metrics which record nothing, the default of the extract functions.
+    """
+    enabled = False
+    __timer = _NullTimer()
+
+    def stage(self, name: str) -> _NullTimer:
+        return self.__timer
+
+    def observe(self, name: str, seconds: float):
+        pass
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def sample(self, name: str, value: float):
+        pass
+
+    def merge(self, other: Metrics):
+        # the shared NULL_METRICS must stay empty.
+        return self
+
+    def write_textfile(self, path: str):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+class SlowDocumentCapture:
+    """
+    Times each document and captures the documents slower than the threshold to the given directory:
+    the source, the metrics of its stages and, if profile is True, the cProfile stats to replay it offline.
+        capture = SlowDocumentCapture('/tmp/slow', threshold_seconds=0.5, metrics=metrics)
+        with capture.document(name, source) as document_metrics:
+            extract_anchor_offsets(source, metrics=document_metrics)
+    """
+
+    def __init__(self, directory: str, threshold_seconds: float, metrics: Metrics = None, profile: bool = False):
+        self.directory = directory
+        self.threshold_seconds = threshold_seconds
+        self.metrics = metrics or Metrics()
+        self.profile = profile
+        os.makedirs(directory, exist_ok=True)
+
+    def document(self, name: str, source) -> "_Document":
+        return _Document(self, name, source)
+
+    def save(self, name: str, source, metrics: Metrics, seconds: float, profiler: cProfile.Profile = None) -> str:
+        """
+        Write the captured document, the files share a stem derived from the name of the document,
+        the base name followed by a digest of the full name, so the documents of the same base name
+        in different directories do not overwrite each other.
+        :return str - the stem of the files.
+        """
+        digest = hashlib.blake2b(str(name).encode('utf-8'), digest_size=4).hexdigest()
+        base = re.sub(r'[^\w.-]+', '_', os.path.basename(str(name))) or 'document'
+        stem = os.path.join(self.directory, f'{base}.{digest}')
+        if isinstance(source, str) and os.path.isfile(source):
+            with open(source, 'rb') as file:
+                source = file.read()
+        if isinstance(source, (bytes, str)):
+            with open(f'{stem}.src', 'wb') as file:
+                file.write(source.encode('utf-8') if isinstance(source, str) else source)
+        with open(f'{stem}.json', 'w', encoding='utf-8') as file:
+            json.dump({'name': str(name), 'seconds': seconds, **metrics.to_dict()}, file, ensure_ascii=False, indent=2)
+        if profiler is not None:
+            profiler.dump_stats(f'{stem}.prof')
+        return stem
+
+
+class _Document:
+    def __init__(self, capture: SlowDocumentCapture, name: str, source):
+        self.capture = capture
+        self.name = name
+        self.source = source
+        self.metrics = Metrics()
+        self.profiler = cProfile.Profile() if capture.profile else None
+
+    def __enter__(self) -> Metrics:
+        if self.profiler is not None:
+            self.profiler.enable()
+        self.start = time.perf_counter()
+        return self.metrics
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        seconds = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self.profiler.disable()
+        capture = self.capture
+        self.metrics.observe('document', seconds)
+        self.metrics.count('documents')
+        if seconds > capture.threshold_seconds:
+            self.metrics.count('slow_documents')
+            capture.save(self.name, self.source, self.metrics, seconds, self.profiler)
+        capture.metrics.merge(self.metrics)
@@ -0,0 +1,74 @@
+import re
+import bisect
+from array import array
+
+from .anchor_extractor import Keyword
+
+
+def _build_table() -> dict[int, int]:
+    table = {
+        # full-width digits and latin letters.
+        **{code: code - 0xFEE0 for code in range(ord('０'), ord('９') + 1)},
+        **{code: code - 0xFEE0 for code in range(ord('Ａ'), ord('Ｚ') + 1)},
+        **{code: code - 0xFEE0 for code in range(ord('ａ'), ord('ｚ') + 1)},
+    }
+    table.update(str.maketrans({
+        '（': '(', '）': ')', '〔': '[', '〕': ']', '［': '[', '］': ']', '｛': '{', '｝': '}',
+        '\u3000': ' ', '\u00a0': ' ',
+    }))
+    table.update({ord(c): None for c in DELETED_CHARS})
+    return table
+
+
+# The zero-width and invisible characters, they are removed from the normalized text.
+DELETED_CHARS = '\u200b\u200c\u200d\u2060\ufeff\u00ad'
+NORMALIZE_TABLE = _build_table()
+
+
+class NormalizedText:
+    """
+    The normalized text of a document, the full-width brackets, digits and letters are folded into half-width,
+    the ideographic spaces into spaces, and the invisible characters are removed.
+    The text is normalized once by str.translate, every extractor runs on the normalized text,
+    and the anchors are rebased to the offsets of the original text through a compact offset map,
+    which only records where the characters are removed.
+    """
+    __deleted_pattern = re.compile(f'[{DELETED_CHARS}]')
+
+    def __init__(self, original: str):
+        self.original = original
+        self.text = original.translate(NORMALIZE_TABLE)
+        # the normalized index of each removed character, the k-th one is at original index (value + k).
+        self.__breaks = array('l')
+        if len(self.text) != len(original):
+            self.__breaks.extend(m.start() - k for k, m in enumerate(self.__deleted_pattern.finditer(original)))
+
+    def to_original(self, index: int) -> int:
+        """
+        Map an index of the normalized text to the index of the original text.
+        :params int index - the index of the normalized text.
+        :return int - the index of the same character in the original text.
+        """
+        breaks = self.__breaks
+        return index + bisect.bisect_right(breaks, index) if breaks else index
+
+    def span_to_original(self, start_index: int, end_index: int) -> tuple[int, int]:
+        """
+        Map a span of the normalized text to the span of the original text, end_index is exclusive.
+        The characters removed at the boundaries are kept out of the span.
+        """
+        if end_index <= start_index:
+            start_index = self.to_original(start_index)
+            return start_index, start_index
+        return self.to_original(start_index), self.to_original(end_index - 1) + 1
+
+    def rebase(self, keywords: list[Keyword]) -> list[Keyword]:
+        """
+        Rebase the offsets of the given keywords in place from the normalized text to the original text.
+        :params list[Keyword] keywords - the keywords extracted from the normalized text.
+        :return list[Keyword] - the same keywords.
+        """
+        if self.__breaks:
+            for keyword in keywords:
+                keyword.start_index, keyword.end_index = self.span_to_original(keyword.start_index, keyword.end_index)
+        return keywords
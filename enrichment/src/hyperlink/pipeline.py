@@ -0,0 +1,289 @@
+"""
+An asyncio pipeline which overlaps the reads, the enrichment and the writes of documents, so the CPU is not
+idle while a document is being read from the disk or S3, or while a result is being written.
+
+    sources -> [read queue] -> read -> [enrich queue] -> enrich -> [write queue] -> write
+    read    - `readers` tasks await the read function, the local files are read in threads.
+    enrich  - the parse, the text-node collection, the extraction and the node mapping run in a pool of
+              `workers` processes, at most `in_flight` documents are submitted to the pool at a time.
+    write   - `writers` tasks await the write function, the results are written in threads.
+The queues are bounded by queue_size, so a slow stage applies backpressure to the stages before it,
+and the depths of the queues are sampled into the metrics together with the timings of the stages,
+e.g. a full enrich queue and an empty write queue mean the pipeline is bound by the CPU.
+- run: python -m hyperlink.pipeline --output /tmp/anchors --workers 4 *.xml
+"""
+
+import os
+import time
+import asyncio
+import logging
+import argparse
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable
+
+from ._io import atomic_write
+from ._lazy import lazy_import
+from .metrics import Metrics
+from ._worker import anchor_to_dict, warm_up
+
+orjson = lazy_import('orjson')
+boto3 = lazy_import('boto3')
+logger = logging.getLogger(__name__)
+
+Reader = Callable[[Any], Awaitable[bytes]]
+Writer = Callable[[Any, bytes], Awaitable[None]]
+
+# the end of a queue, each task of a stage consumes one.
+_DONE = object()
+
+
+def enrich_document(data: bytes, ignore_tags: tuple[str, ...] = None) -> tuple[bytes, Metrics]:
+    """
+    Enrich an xml document within a worker process.
+    :return tuple[bytes, Metrics] - the JSON Lines of the text nodes with anchors and the metrics of the stages.
+    """
+    from .xml_text_helper import extract_anchor_offsets
+    metrics = Metrics()
+    text_nodes = extract_anchor_offsets(data, ignore_tags, metrics)
+    lines = [
+        orjson.dumps({
+            'node_id': x.text.node_id,
+            'type': x.text.type,
+            'start_index': x.start_index,
+            'end_index': x.end_index,
+            'anchors': [anchor_to_dict(a) for a in x.anchors],
+        })
+        for x in text_nodes if x.anchors
+    ]
+    return b'\n'.join(lines) + b'\n' if lines else b'', metrics
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+async def read_file(path: str) -> bytes:
+    return await asyncio.to_thread(_read_file, path)
+
+
+def s3_reader(bucket: str, client=None) -> Reader:
+    """
+    Returns a read function of the objects in the given bucket, the sources are the keys of the objects.
+    The boto3 client is thread-safe, so the objects are fetched in threads.
+    """
+    client = client or boto3.client('s3')
+
+    def get(key: str) -> bytes:
+        return client.get_object(Bucket=bucket, Key=key)['Body'].read()
+
+    async def read(key: str) -> bytes:
+        return await asyncio.to_thread(get, key)
+
+    return read
+
+
+def directory_writer(directory: str, suffix: str = '.anchors.jsonl', root: str = None) -> Writer:
+    """
+    Returns a write function which writes the result of a source into the given directory,
+    the result is written aside and renamed into place, so a reader never sees a partial file.
+    The relative path of the source is kept, so 2023/a/1.xml and 2024/b/1.xml do not overwrite each other.
+    :params str root - the sources are made relative to it, e.g. the input directory of the local files,
+                       otherwise the leading separator and the drive of the sources are stripped.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    def output_path(source) -> str:
+        source = str(source)
+        if root is not None:
+            source = os.path.relpath(source, root)
+        relative = os.path.normpath(os.path.splitdrive(source)[1]).lstrip('/\\')
+        if relative.split(os.sep)[0] in ('..', '.', ''):
+            raise ValueError(f"The {source} is outside of the output directory.")
+        return os.path.join(directory, relative + suffix)
+
+    def put(source, data: bytes):
+        path = output_path(source)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path, fsync=False) as file:
+            file.write(data)
+
+    async def write(source, data: bytes):
+        await asyncio.to_thread(put, source, data)
+
+    return write
+
+
+@dataclass
+class PipelineConfig:
+    readers: int = 8
+    workers: int = os.cpu_count() or 1
+    # the documents submitted to the process pool at a time, two per worker keep every worker busy.
+    in_flight: int = 0
+    writers: int = 4
+    queue_size: int = 64
+    sample_interval: float = 0.05
+    ignore_tags: tuple[str, ...] = None
+
+    def __post_init__(self):
+        self.in_flight = self.in_flight or self.workers * 2
+
+
+class Pipeline:
+
+    def __init__(
+            self,
+            config: PipelineConfig = None,
+            read: Reader = read_file,
+            write: Writer = None,
+            metrics: Metrics = None,
+    ):
+        self.config = config or PipelineConfig()
+        self.read = read
+        self.write = write
+        self.metrics = metrics or Metrics()
+        # the (source, error) of the documents which failed, a failed document does not stop the pipeline.
+        self.failures: list[tuple[Any, str]] = []
+
+    async def run(self, sources: Iterable | AsyncIterable, executor: ProcessPoolExecutor = None) -> Metrics:
+        """
+        Enrich the given sources, the sources are read, enriched and written concurrently.
+        :params Iterable | AsyncIterable sources - the paths, keys or anything else the read function accepts.
+        :params ProcessPoolExecutor executor - the pool to enrich in, a pool of config.workers processes by default.
+        :return Metrics - the metrics of the run, the timings of the stages within the workers are merged in.
+        """
+        config = self.config
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(config.workers, initializer=warm_up)
+
+        read_queue, enrich_queue, write_queue = (asyncio.Queue(config.queue_size) for _ in range(3))
+        sampler = asyncio.create_task(self.__sample({'read': read_queue, 'enrich': enrich_queue, 'write': write_queue}))
+        producer = asyncio.create_task(self.__produce(sources, read_queue))
+        readers = [asyncio.create_task(self.__read(read_queue, enrich_queue)) for _ in range(config.readers)]
+        enrichers = [
+            asyncio.create_task(self.__enrich(executor, enrich_queue, write_queue)) for _ in range(config.in_flight)
+        ]
+        writers = [asyncio.create_task(self.__write(write_queue)) for _ in range(config.writers)]
+        started = time.perf_counter()
+        try:
+            # each stage ends the queue after it once all of its tasks are done.
+            for tasks, downstream, consumers in (
+                    ([producer], read_queue, config.readers),
+                    (readers, enrich_queue, config.in_flight),
+                    (enrichers, write_queue, config.writers),
+            ):
+                await asyncio.gather(*tasks)
+                for _ in range(consumers):
+                    await downstream.put(_DONE)
+            await asyncio.gather(*writers)
+        finally:
+            for task in [sampler, producer, *readers, *enrichers, *writers]:
+                task.cancel()
+            self.metrics.observe('pipeline', time.perf_counter() - started)
+            if own_executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+        return self.metrics
+
+    async def __produce(self, sources, queue: asyncio.Queue):
+        if hasattr(sources, '__aiter__'):
+            async for source in sources:
+                await queue.put(source)
+        else:
+            for source in sources:
+                await queue.put(source)
+
+    async def __read(self, queue: asyncio.Queue, downstream: asyncio.Queue):
+        metrics = self.metrics
+        while (source := await queue.get()) is not _DONE:
+            started = time.perf_counter()
+            try:
+                data = await self.read(source)
+            except Exception as e:  # noqa: BLE001 - the failure is recorded, the other documents go on.
+                self.__fail(source, e)
+                continue
+            metrics.observe('read', time.perf_counter() - started)
+            metrics.count('bytes_read', len(data))
+            await downstream.put((source, data))
+
+    async def __enrich(self, executor: ProcessPoolExecutor, queue: asyncio.Queue, downstream: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        metrics = self.metrics
+        ignore_tags = self.config.ignore_tags
+        while (item := await queue.get()) is not _DONE:
+            source, data = item
+            started = time.perf_counter()
+            try:
+                result, worker_metrics = await loop.run_in_executor(executor, enrich_document, data, ignore_tags)
+            except Exception as e:  # noqa: BLE001 - e.g. a malformed document, or a worker process died.
+                self.__fail(source, e)
+                continue
+            # the enrich stage includes the wait for a worker and the transfer of the document and its result.
+            metrics.observe('enrich', time.perf_counter() - started)
+            metrics.merge(worker_metrics)
+            await downstream.put((source, result))
+
+    async def __write(self, queue: asyncio.Queue):
+        metrics = self.metrics
+        while (item := await queue.get()) is not _DONE:
+            source, result = item
+            started = time.perf_counter()
+            try:
+                if self.write is not None:
+                    await self.write(source, result)
+            except Exception as e:  # noqa: BLE001 - the failure is recorded, the other documents go on.
+                self.__fail(source, e)
+                continue
+            metrics.observe('write', time.perf_counter() - started)
+            metrics.count('bytes_written', len(result))
+            metrics.count('documents')
+
+    async def __sample(self, queues: dict[str, asyncio.Queue]):
+        while True:
+            for name, queue in queues.items():
+                self.metrics.sample(f'{name}_queue_depth', queue.qsize())
+            await asyncio.sleep(self.config.sample_interval)
+
+    def __fail(self, source, error: Exception):
+        logger.warning(f"Failed to enrich {source}: {type(error).__name__}: {error}")
+        self.failures.append((source, f'{type(error).__name__}: {error}'))
+        self.metrics.count('errors')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Enrich the xml documents through the asyncio pipeline.')
+    parser.add_argument('sources', nargs='+', help='the paths of the documents, or the keys with --bucket.')
+    parser.add_argument('--output', required=True, help='the directory to write the anchors into.')
+    parser.add_argument('--bucket', help='read the sources from the S3 bucket.')
+    parser.add_argument('--readers', type=int, default=PipelineConfig.readers)
+    parser.add_argument('--workers', type=int, default=PipelineConfig.workers)
+    parser.add_argument('--in-flight', type=int, default=0)
+    parser.add_argument('--writers', type=int, default=PipelineConfig.writers)
+    parser.add_argument('--queue-size', type=int, default=PipelineConfig.queue_size)
+    parser.add_argument('--metrics', help='the textfile to export the metrics to, .prom for the Prometheus format.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    config = PipelineConfig(
+        readers=args.readers,
+        workers=args.workers,
+        in_flight=args.in_flight,
+        writers=args.writers,
+        queue_size=args.queue_size,
+    )
+    # the local files keep their paths relative to the directory which holds them all.
+    root = None if args.bucket else os.path.commonpath([os.path.dirname(os.path.abspath(x)) for x in args.sources])
+    pipeline = Pipeline(
+        config,
+        read=s3_reader(args.bucket) if args.bucket else read_file,
+        write=directory_writer(args.output, root=root),
+    )
+    metrics = asyncio.run(pipeline.run(args.sources))
+    logger.info(f"Enriched {metrics.counters['documents']} documents, {len(pipeline.failures)} failed.")
+    if args.metrics:
+        metrics.write_textfile(args.metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""
+A long-running enrichment server, it keeps the compiled patterns and dictionaries warm in a pool of worker
+processes, so a job does not pay the start-up of a process per document.
+
+The protocol is newline-delimited JSON over a Unix socket or a localhost TCP port:
+    request  - {"id": 1, "content": "plain text"} or {"id": 1, "xml": "<p>...</p>"}, optionally "deadline_ms".
+    response - {"id": 1, "anchors": [{"value": ..., "start_index": ..., "end_index": ..., "type": ...}]}
+               or {"id": 1, "error": "..."}.
+The small requests are micro-batched into one call of a worker to amortize the per-call overhead,
+the pending requests are bounded to apply backpressure, and each request is answered by its deadline.
+A connection stops being read while max_connection_requests of its requests are unanswered, so a fast
+client is held back by the socket rather than by the memory of the server. A malformed or oversized
+request is answered with an error, the connection goes on with the next line.
+- run: python -m hyperlink.server --unix /tmp/enrichment.sock --workers 4
+"""
+
+import os
+import time
+import asyncio
+import logging
+import argparse
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+
+from ._lazy import lazy_import
+from ._worker import anchor_to_dict, warm_up
+
+orjson = lazy_import('orjson')
+logger = logging.getLogger(__name__)
+
+def enrich_batch(requests: list[dict]) -> list[dict]:
+    """
+    Enrich a batch of requests within a worker process, a failed request does not fail the batch.
+    """
+    from .xml_text_helper import extract_anchors, extract_anchor_offsets
+    results = []
+    for request in requests:
+        try:
+            if 'xml' in request:
+                anchors = [a for node in extract_anchor_offsets(request['xml'].encode('utf-8')) for a in node.anchors]
+                anchors = list({id(x): x for x in anchors}.values())
+            else:
+                anchors = extract_anchors(request.get('content') or '')
+            results.append({'anchors': [anchor_to_dict(x) for x in anchors]})
+        except Exception as e:  # noqa: BLE001 - the error is reported to the client.
+            results.append({'error': f'{type(e).__name__}: {e}'})
+    return results
+
+
+@dataclass
+class ServerConfig:
+    workers: int = os.cpu_count() or 1
+    # a batch is dispatched once it holds max_batch_size requests or max_batch_chars characters,
+    # or max_batch_wait_ms has passed since its first request.
+    max_batch_size: int = 32
+    max_batch_chars: int = 256 * 1024
+    max_batch_wait_ms: float = 2.0
+    # the requests beyond max_pending wait for a slot until their deadlines.
+    max_pending: int = 1024
+    default_deadline_ms: float = 10_000
+    # the largest request line accepted, a judgment of several MB is common.
+    max_request_bytes: int = 16 * 1024 * 1024
+    # the unanswered requests of a connection, the connection is not read beyond them.
+    max_connection_requests: int = 64
+
+
+def _validate(request) -> str:
+    """
+    Returns why the request is invalid, or None if it is valid.
+    """
+    if not isinstance(request, dict):
+        return 'a request must be a JSON object'
+    for name in ('content', 'xml'):
+        if request.get(name) is not None and not isinstance(request[name], str):
+            return f'"{name}" must be a string'
+    deadline_ms = request.get('deadline_ms')
+    if deadline_ms is not None and (isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float))):
+        return '"deadline_ms" must be a number'
+    return None
+
+
+@dataclass
+class _Pending:
+    request: dict
+    deadline: float
+    future: asyncio.Future = field(repr=False)
+
+    @property
+    def size(self) -> int:
+        return len(self.request.get('content') or self.request.get('xml') or '')
+
+
+class EnrichmentServer:
+
+    def __init__(self, config: ServerConfig = None):
+        self.config = config or ServerConfig()
+        self.executor: ProcessPoolExecutor = None
+        self.stats = {'requests': 0, 'batches': 0, 'timeouts': 0, 'errors': 0}
+        self.__queue: asyncio.Queue = None
+        self.__slots: asyncio.Semaphore = None
+        self.__batcher: asyncio.Task = None
+        self.__server: asyncio.AbstractServer = None
+
+    async def start(self, unix_path: str = None, host: str = '127.0.0.1', port: int = 0):
+        config = self.config
+        self.executor = ProcessPoolExecutor(config.workers, initializer=warm_up)
+        # submit a no-op to every worker, so they are spawned and warmed up before serving.
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, enrich_batch, []) for _ in range(config.workers)))
+
+        self.__queue = asyncio.Queue(config.max_pending)
+        # at most two batches per worker are in flight, the others wait in the queue.
+        self.__slots = asyncio.Semaphore(config.workers * 2)
+        self.__batcher = asyncio.create_task(self.__run_batcher())
+        if unix_path:
+            self.__server = await asyncio.start_unix_server(
+                self.__handle, path=unix_path, limit=config.max_request_bytes
+            )
+        else:
+            self.__server = await asyncio.start_server(
+                self.__handle, host=host, port=port, limit=config.max_request_bytes
+            )
+        logger.info(f"The enrichment server is listening on {self.address}.")
+        return self
+
+    @property
+    def address(self):
+        return self.__server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        async with self.__server:
+            await self.__server.serve_forever()
+
+    async def stop(self):
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__batcher.cancel()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    async def submit(self, request: dict) -> dict:
+        """
+        Enrich a request through the micro-batches, the result is an error if the deadline passes first.
+        """
+        loop = asyncio.get_running_loop()
+        deadline_ms = request.get('deadline_ms') or self.config.default_deadline_ms
+        deadline = loop.time() + deadline_ms / 1000
+        pending = _Pending(request, deadline, loop.create_future())
+        self.stats['requests'] += 1
+        try:
+            await asyncio.wait_for(self.__queue.put(pending), deadline - loop.time())
+            return await asyncio.wait_for(asyncio.shield(pending.future), deadline - loop.time())
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            return {'error': 'deadline exceeded'}
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        lock = asyncio.Lock()
+        tasks = set()
+        in_flight = asyncio.Semaphore(self.config.max_connection_requests)
+
+        async def reply(response: dict):
+            async with lock:
+                writer.write(orjson.dumps(response) + b'\n')
+                await writer.drain()
+
+        async def answer(line: bytes):
+            request = None
+            try:
+                request = orjson.loads(line)
+                if error := _validate(request):
+                    raise ValueError(error)
+                response = await self.submit(request)
+            except (orjson.JSONDecodeError, ValueError) as e:
+                self.stats['errors'] += 1
+                response = {'error': f'invalid request: {e}'}
+            except Exception as e:  # noqa: BLE001 - the client is answered whatever goes wrong.
+                self.stats['errors'] += 1
+                logger.exception("Failed to answer a request.")
+                response = {'error': f'{type(e).__name__}: {e}'}
+            response['id'] = request.get('id') if isinstance(request, dict) else None
+            try:
+                await reply(response)
+            finally:
+                in_flight.release()
+
+        try:
+            async for line in self.__lines(reader):
+                if line is None:
+                    self.stats['errors'] += 1
+                    await reply({'id': None, 'error': f'request too large: the limit is {self.config.max_request_bytes} bytes'})
+                elif line.strip():
+                    # the connection is not read any further until one of its requests is answered.
+                    await in_flight.acquire()
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def __lines(self, reader: asyncio.StreamReader):
+        """
+        Yield the lines of the connection, or None for a line beyond max_request_bytes, which is discarded
+        chunk by chunk rather than buffered.
+        """
+        oversized = False
+        while True:
+            try:
+                line = await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                # the last line without a newline.
+                if e.partial and not oversized:
+                    yield e.partial
+                elif oversized:
+                    yield None
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+                oversized = True
+                continue
+            if oversized:
+                oversized = False
+                yield None
+            else:
+                yield line
+
+    async def __run_batcher(self):
+        config = self.config
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.__queue.get()]
+            size = batch[0].size
+            batch_deadline = loop.time() + config.max_batch_wait_ms / 1000
+            while len(batch) < config.max_batch_size and size < config.max_batch_chars:
+                try:
+                    pending = await asyncio.wait_for(self.__queue.get(), batch_deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                batch.append(pending)
+                size += pending.size
+
+            # the requests whose deadlines have passed are not worth the work.
+            now = loop.time()
+            batch = [x for x in batch if x.deadline > now and not x.future.done()]
+            if batch:
+                await self.__slots.acquire()
+                self.stats['batches'] += 1
+                asyncio.create_task(self.__dispatch(batch))
+
+    async def __dispatch(self, batch: list[_Pending]):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, enrich_batch, [x.request for x in batch])
+            for pending, result in zip(batch, results):
+                if not pending.future.done():
+                    pending.future.set_result(result)
+        except Exception as e:  # noqa: BLE001 - e.g. a worker process died, the batch is failed as a whole.
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_result({'error': f'{type(e).__name__}: {e}'})
+        finally:
+            self.__slots.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the enrichment server.')
+    parser.add_argument('--unix', help='the path of the unix socket, a localhost TCP port is used if it is absent.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=ServerConfig.workers)
+    parser.add_argument('--max-batch-size', type=int, default=ServerConfig.max_batch_size)
+    parser.add_argument('--max-batch-wait-ms', type=float, default=ServerConfig.max_batch_wait_ms)
+    parser.add_argument('--max-pending', type=int, default=ServerConfig.max_pending)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    config = ServerConfig(
+        workers=args.workers,
+        max_batch_size=args.max_batch_size,
+        max_batch_wait_ms=args.max_batch_wait_ms,
+        max_pending=args.max_pending,
+    )
+
+    async def run():
+        server = await EnrichmentServer(config).start(args.unix, port=args.port)
+        started = time.perf_counter()
+        try:
+            await server.serve_forever()
+        finally:
+            logger.info(f"Served {server.stats} in {time.perf_counter() - started:.1f} s.")
+            await server.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
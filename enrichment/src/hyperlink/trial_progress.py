@@ -0,0 +1,164 @@
+import re
+from dataclasses import dataclass, field
+from enum import Enum
+
+from .anchor_extractor import Anchor, AnchorType
+
+
+class TrialStage(Enum):
+    FIRST = 1  # 一审
+    SECOND = 2  # 二审
+    RETRIAL = 3  # 再审
+
+
+# The administrative division code of the province which a court belongs to.
+COURT_CODES = {
+    '最高法': '00', '京': '11', '津': '12', '冀': '13', '晋': '14', '蒙': '15', '内': '15',
+    '辽': '21', '吉': '22', '黑': '23', '沪': '31', '苏': '32', '浙': '33', '皖': '34',
+    '闽': '35', '赣': '36', '鲁': '37', '豫': '41', '鄂': '42', '湘': '43', '粤': '44',
+    '桂': '45', '琼': '46', '渝': '50', '川': '51', '黔': '52', '贵': '52', '云': '53',
+    '滇': '53', '藏': '54', '陕': '61', '甘': '62', '青': '63', '宁': '64', '新': '65',
+    '兵': '66',
+}
+
+# The last character of a case type tells which stage the case is in, e.g. 民初, 民终, 民再, 民申.
+CASE_TYPE_STAGES = {
+    '初': TrialStage.FIRST,
+    '终': TrialStage.SECOND,
+    '再': TrialStage.RETRIAL,
+    '申': TrialStage.RETRIAL,
+    '抗': TrialStage.RETRIAL,
+    '监': TrialStage.RETRIAL,
+}
+
+STAGE_KEYWORDS = {
+    '一审': TrialStage.FIRST,
+    '二审': TrialStage.SECOND,
+    '再审': TrialStage.RETRIAL,
+}
+
+
+@dataclass(frozen=True)
+class CaseNumber:
+    year: int
+    court: str
+    court_code: str
+    case_type: str
+    seq: int
+    stage: TrialStage = field(default=None, compare=False)
+
+    @property
+    def key(self) -> str:
+        """
+        The normalized case number, brackets are always full-width.
+        """
+        return f'（{self.year}）{self.court}{self.case_type}{self.seq}号'
+
+
+@dataclass
+class CaseNumberAnchor(Anchor):
+    case_number: CaseNumber = field(default=None, compare=False)
+
+    @property
+    def stage(self) -> TrialStage:
+        return self.case_number.stage if self.case_number else None
+
+
+@dataclass
+class StageAnchor(Anchor):
+    """
+    A procedure stage keyword, e.g. 一审, whose stage tells the stage of the case numbers right after it.
+    """
+    stage: TrialStage = field(default=None, compare=False)
+
+
+class TrialProgressExtractor:
+    """
+    Recognizes the case numbers (e.g. （2023）京01民终123号) and the procedure stages (一审/二审/再审) of a document,
+    and links the case numbers into a trial-progress chain: the parent of a case number anchor is the first
+    mention of the latest case number in the nearest preceding stage.
+    The full-width and half-width brackets are matched by character classes of one compiled pattern,
+    and the court codes are normalized through the prebuilt COURT_CODES table.
+    """
+    __case_number_pattern = re.compile(
+        r'[(（〔\[]\s*(?P<year>\d{4})\s*[)）〕\]]\s*'
+        r'(?P<court>(?P<province>' + '|'.join(sorted(COURT_CODES, key=len, reverse=True)) + r')(?P<division>\d{0,4}))'
+        r'(?P<type>[一-龥]{1,4}?)(?P<seq>\d+)号'
+    )
+    __stage_pattern = re.compile('|'.join(STAGE_KEYWORDS))
+    # how far a stage keyword may precede a case number to tell its stage, e.g. 一审案号：（2023）京01执12号.
+    __stage_distance = 8
+
+    def extract(self, content: str, start: int = 0, end: int = None) -> list[Anchor]:
+        """
+        Extract the trial-progress anchors from the given content.
+        :params str content - the content to extract the anchors from.
+        :params int start - the index to start scanning from, the offsets of anchors are still relative to content.
+        :params int end - the index to stop scanning at, defaults to the length of content.
+        :return list[Anchor] - the case number anchors and the stage keyword anchors, ordered by start index.
+        """
+        if not content:
+            return []
+
+        end = len(content) if end is None else end
+        stages = [
+            StageAnchor(m.group(), m.start(), m.end(), AnchorType.TRIAL_PROGRESS, STAGE_KEYWORDS[m.group()])
+            for m in self.__stage_pattern.finditer(content, start, end)
+        ]
+        stage_index = 0
+
+        case_numbers: list[CaseNumberAnchor] = []
+        for matcher in self.__case_number_pattern.finditer(content, start, end):
+            case_type = matcher.group('type')
+            stage = CASE_TYPE_STAGES.get(case_type[-1])
+            if stage is None:
+                # fall back to the nearest stage keyword before the case number.
+                while stage_index < len(stages) and stages[stage_index].end_index <= matcher.start():
+                    stage_index += 1
+                if stage_index and matcher.start() - stages[stage_index - 1].end_index <= self.__stage_distance:
+                    stage = stages[stage_index - 1].stage
+
+            case_number = CaseNumber(
+                int(matcher.group('year')),
+                matcher.group('court'),
+                COURT_CODES[matcher.group('province')] + matcher.group('division'),
+                case_type,
+                int(matcher.group('seq')),
+                stage,
+            )
+            case_numbers.append(
+                CaseNumberAnchor(
+                    matcher.group(), matcher.start(), matcher.end(), AnchorType.TRIAL_PROGRESS, case_number
+                )
+            )
+
+        self.link(case_numbers)
+        return sorted([*case_numbers, *stages], key=lambda x: x.start_index)
+
+    @staticmethod
+    def link(anchors: list[CaseNumberAnchor]):
+        """
+        Link the case number anchors into a trial-progress chain, the parent of a case number is the latest
+        (by year) case number of the nearest strictly earlier stage, two cases of the same stage are never linked.
+        :params list[CaseNumberAnchor] anchors - the case number anchors of a document.
+        """
+        first_mentions: dict[CaseNumber, CaseNumberAnchor] = {}
+        for anchor in anchors:
+            first_mentions.setdefault(anchor.case_number, anchor)
+
+        chain = sorted(
+            (x for x in first_mentions.values() if x.case_number.stage),
+            key=lambda x: (x.case_number.stage.value, x.case_number.year, x.start_index),
+        )
+        previous_by_case: dict[CaseNumber, CaseNumberAnchor] = {}
+        # the last anchor of the stage before the current one, and the last anchor of the current stage.
+        previous, last = None, None
+        for current in chain:
+            if last is not None and last.case_number.stage != current.case_number.stage:
+                previous = last
+            if previous is not None:
+                previous_by_case[current.case_number] = previous
+            last = current
+
+        for anchor in anchors:
+            anchor.parent = previous_by_case.get(anchor.case_number)
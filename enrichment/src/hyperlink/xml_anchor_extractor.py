@@ -1,15 +1,15 @@
-import re
+from __future__ import annotations
 
-from lxml.etree import Element
+from typing import TYPE_CHECKING
+
+from .anchor_extractor import SentenceSplitter
+
+if TYPE_CHECKING:
+    from lxml.etree import Element
 
 
 def split_and_keep_separator(content: str, separators: list[str]):
-    pattern = '|'.join(re.escape(x) for x in separators)
-    # Ensure the separator is being remained
-    values = re.split(f'({pattern})', content)
-    # Ensure the last sentence is not missed
-    values.append('')
-    return [p + s for p, s in zip(values[0::2], values[1::2])]
+    return SentenceSplitter.of(tuple(separators)).split(content)
 
 
 def get_text_nodes(element: Element, node_id = 0, ignore_tags=None):
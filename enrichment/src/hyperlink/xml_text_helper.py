@@ -1,11 +1,24 @@
+from __future__ import annotations
+
 import os
-import re
-import inspect
+from array import array
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+from ._lazy import lazy_import
+from .anchor_extractor import TitleExtractor, ReadonlyNavigableDict, Keyword, Anchor, SentenceSplitter, \
+    AbbreviationResolver
+from .trial_progress import TrialProgressExtractor
+from .normalizer import NormalizedText
+from .metrics import Metrics, NULL_METRICS
+
+if TYPE_CHECKING:
+    from lxml.etree import Element, ElementTree
+
+etree = lazy_import('lxml.etree')
 
-from lxml import etree
-from lxml.etree import Element, ElementTree
-from anchor_extractor import TitleExtractor, ReadonlyNavigableDict, Keyword, Anchor
+# the location of this module, the relative filenames passed to read_xml are resolved against it.
+CURRENT_LOCATION = os.path.dirname(os.path.abspath(__file__))
 
 
 @dataclass
@@ -22,75 +35,133 @@ class TextNode(Keyword):
 
 
 class Texts:
+    """
+    Collects the text nodes of a tree, the node ids are the preorder indexes of elements,
+    i.e. the indexes of root.iter(etree.Element), the same as the node ids of TextNodeTarget.
+    The comments and processing instructions are dropped as by the parser of TextNodeTarget,
+    their tails join the text before them.
+    """
 
     def __init__(self, root, ignore_tags=None):
-        fake_root = Element('fake__root')
+        fake_root = etree.Element('fake__root')
         fake_root.append(root)
         self.__root = fake_root
+        self.__nodes = None
         self.ignore_tags = ignore_tags or []
-        self.text_nodes = self.__get_text_nodes(fake_root)
+        self.text_nodes = []
+        self.__get_text_nodes(fake_root, None, self.text_nodes)
 
     def get_node(self, node_id) -> Element:
-        return list(self.__root[0].iter())[node_id]
+        return self.__get_nodes()[node_id]
 
     def get_nodes(self, start_node_id, end_node_id) -> list[Element]:
-        return list(self.__root[0].iter())[start_node_id:end_node_id]
-
-    def __get_text_nodes(self, element: Element, node_id: int = 0) -> list[Text]:
-        text_nodes = []
+        return self.__get_nodes()[start_node_id:end_node_id]
+
+    def __get_nodes(self) -> list[Element]:
+        if self.__nodes is None:
+            self.__nodes = list(self.__root[0].iter(etree.Element))
+        return self.__nodes
+
+    def __get_text_nodes(self, element: Element, element_id: int, text_nodes: list[Text], node_id: int = 0) -> int:
+        """
+        Collect the text of the element and the text nodes of its descendants, whose first child has the given node id.
+        :return int - the node id after the last descendant of the element.
+        """
         ignore_tags = self.ignore_tags
+        # the node which the text being collected belongs to, None while the text is dropped.
+        owner, owner_type, chunks = element_id, 'text', [element.text or '']
 
         for child in element:
-            if child.tag not in ignore_tags:
-                if child.text and not child.text.isspace():
-                    text_nodes.append(Text(node_id, child.text, 'text'))
+            if not isinstance(child.tag, str):
+                chunks.append(child.tail or '')
+                continue
+            _append_text(text_nodes, owner, owner_type, chunks)
 
-                if len(child):
-                    text_nodes.extend(self.__get_text_nodes(child, node_id + 1))
+            child_id = node_id
+            node_id += 1
+            if child.tag in ignore_tags:
+                # the ignored descendants still take their preorder indexes, and the tail is pruned with them.
+                node_id += sum(1 for _ in child.iterdescendants(etree.Element))
+                owner, chunks = None, []
+                continue
 
-                if child.tail and not child.tail.isspace():
-                    text_nodes.append(Text(node_id, child.tail, 'tail'))
+            node_id = self.__get_text_nodes(child, child_id, text_nodes, node_id)
+            owner, owner_type, chunks = child_id, 'tail', [child.tail or '']
 
-            node_id += 1
+        _append_text(text_nodes, owner, owner_type, chunks)
+        return node_id
 
-        return text_nodes
+
+def _append_text(text_nodes: list[Text], owner: int, owner_type: str, chunks: list[str]):
+    value = ''.join(chunks)
+    if owner is not None and value and not value.isspace():
+        text_nodes.append(Text(owner, value, owner_type))
 
 
 def read_xml(filename: str) -> ElementTree:
     norm_rel_path = os.path.normpath(filename)
-    current_location = os.path.dirname(os.path.abspath(inspect.stack()[0][1]))
-    file_path = os.path.join(current_location, norm_rel_path)
+    file_path = os.path.join(CURRENT_LOCATION, norm_rel_path)
     return etree.parse(file_path)
 
 
+SENTENCE_SPLITTER = SentenceSplitter(['。'])
+
+
 def split(content: str, separators: list[str]):
-    pattern = '|'.join(re.escape(x) for x in separators)
-    # Ensure the separator is being remained
-    parts = re.split(f'({pattern})', content)
-    # Ensure the last sentence is not missed
-    parts.append('')
-    return [p + s for p, s in zip(parts[0::2], parts[1::2])]
+    return SentenceSplitter.of(tuple(separators)).split(content)
 
 
-def extract_anchors_by_sentence(content: str):
+def extract_anchors_by_sentence(
+        content: str,
+        splitter: SentenceSplitter = SENTENCE_SPLITTER,
+        metrics: Metrics = NULL_METRICS,
+):
     extractor = TitleExtractor()
-    sentences = split(content, ['。'])
+
+    with metrics.stage('split'):
+        spans = list(splitter.spans(content))
+    metrics.count('sentences', len(spans))
 
     result = []
-    start_index = 0
-    for sentence in sentences:
-        anchors = extractor.extract(sentence)
-        for anchor in anchors:
-            anchor.start_index += start_index
-            anchor.end_index += start_index
-        start_index += len(sentence)
-        result += anchors
+    with metrics.stage('extract'):
+        for start_index, end_index in spans:
+            # the offsets of anchors are relative to the content, there is no need to shift them.
+            result += extractor.extract(content, start_index, end_index)
 
     return result
 
 
-def extract_anchors_from_xml(element):
-    texts = Texts(element)
+def extract_normalized_anchors(text: str, metrics: Metrics = NULL_METRICS) -> list[Anchor]:
+    """
+    Extract the anchors from the normalized text, the offsets of the anchors are relative to the normalized text.
+    """
+    anchors = extract_anchors_by_sentence(text, metrics=metrics)
+    with metrics.stage('resolve'):
+        anchors = AbbreviationResolver().resolve(text, anchors)
+        anchors += TrialProgressExtractor().extract(text)
+    return anchors
+
+
+def extract_anchors(content: str, metrics: Metrics = NULL_METRICS) -> list[Anchor]:
+    # the extractors run on the normalized content, and the anchors are rebased to the original offsets.
+    with metrics.stage('normalize'):
+        normalized = NormalizedText(content)
+    anchors = extract_normalized_anchors(normalized.text, metrics)
+    with metrics.stage('rebase'):
+        anchors = normalized.rebase(anchors)
+    metrics.count('chars', len(content))
+    metrics.count('anchors', len(anchors))
+    return anchors
+
+
+def extract_anchors_from_xml(
+        element,
+        metrics: Metrics = NULL_METRICS,
+        extract: Callable[[str, Metrics], list[Anchor]] = extract_anchors,
+):
+    with metrics.stage('collect'):
+        texts = Texts(element)
+    metrics.count('text_nodes', len(texts.text_nodes))
 
     # concat the content
     content = ''
@@ -102,7 +173,22 @@ def extract_anchors_from_xml(element):
         text_nodes.append(TextNode(text.value, start_index, end_index, text, []))
         start_index = end_index
 
-    anchors = extract_anchors_by_sentence(content)
+    anchors = extract(content, metrics)
+    with metrics.stage('map'):
+        return _attach_anchors(
+            text_nodes,
+            anchors,
+            texts.get_node,
+            lambda node_id: texts.get_node(node_id).getparent(),
+        )
+
+
+def _attach_anchors(
+        text_nodes: list[TextNode],
+        anchors: list[Anchor],
+        node_of: Callable[[int], object],
+        parent_of: Callable[[int], object],
+) -> list[TextNode]:
     nav = ReadonlyNavigableDict[int, TextNode]({x.start_index: x for x in text_nodes})
 
     for anchor in anchors:
@@ -114,11 +200,9 @@ def extract_anchors_from_xml(element):
             continue
 
         if tail.text.type == 'tail':
-            head_element = texts.get_node(head.text.node_id)
-            tail_element = texts.get_node(tail.text.node_id)
-
-            is_parent = tail_element.getparent() == head_element and head.text.type == 'text'
-            is_contained = tail_element.getparent() == head_element.getparent() and head.text.type == 'tail'
+            tail_parent = parent_of(tail.text.node_id)
+            is_parent = tail_parent == node_of(head.text.node_id) and head.text.type == 'text'
+            is_contained = tail_parent == parent_of(head.text.node_id) and head.text.type == 'tail'
             if is_parent or is_contained:
                 head.anchors.append(anchor)
                 tail.anchors.append(anchor)
@@ -126,5 +210,140 @@ def extract_anchors_from_xml(element):
     return text_nodes
 
 
+class TextNodeTarget:
+    """
+    A parser target (etree.XMLParser(target=...)) which collects the text nodes straight from the
+    start/data/end events, so no element object is ever created.
+    The node ids are the preorder indexes of elements, the same as the indexes of root.iter(etree.Element) and the node ids
+    of Texts, and the elements with ignore_tags are pruned together with their descendants and tails, just like Texts.
+    The text nodes are recorded in flat arrays while parsing, the TextNode objects are only built on demand.
+    """
+    TEXT, TAIL = 0, 1
+    __types = ('text', 'tail')
+
+    def __init__(self, ignore_tags=None):
+        self.ignore_tags = frozenset(ignore_tags or ())
+        self.content = ''
+        # the parent node id of each node, -1 for the root.
+        self.parents = array('l')
+        # the node id, the type and the start index of each text node, a text node ends where the next one starts.
+        self.node_ids = array('l')
+        self.types = bytearray()
+        self.offsets = array('l', [0])
+        self._values: list[str] = []
+        self._chunks: list[str] = []
+        self._owner = -1
+        self._owner_type = 0
+        self._open_nodes: list[int] = []
+        self._ignored_depth = 0
+
+    def start(self, tag, attrib, nsmap=None):
+        if self._chunks:
+            self._flush()
+        node_id = len(self.parents)
+        open_nodes = self._open_nodes
+        self.parents.append(open_nodes[-1] if open_nodes else -1)
+        open_nodes.append(node_id)
+        if self._ignored_depth or tag in self.ignore_tags:
+            self._ignored_depth += 1
+            self._owner = -1
+        else:
+            self._owner, self._owner_type = node_id, self.TEXT
+
+    def end(self, tag):
+        if self._chunks:
+            self._flush()
+        node_id = self._open_nodes.pop()
+        if self._ignored_depth:
+            self._ignored_depth -= 1
+            self._owner = -1
+        else:
+            self._owner, self._owner_type = node_id, self.TAIL
+
+    def data(self, data):
+        if self._owner >= 0:
+            self._chunks.append(data)
+
+    def close(self):
+        if self._chunks:
+            self._flush()
+        self.content = ''.join(self._values)
+        return self
+
+    def _flush(self):
+        chunks = self._chunks
+        value = chunks[0] if len(chunks) == 1 else ''.join(chunks)
+        chunks.clear()
+        if not value.isspace():
+            self._values.append(value)
+            self.node_ids.append(self._owner)
+            self.types.append(self._owner_type)
+            self.offsets.append(self.offsets[-1] + len(value))
+
+    @property
+    def text_nodes(self) -> list[TextNode]:
+        types, offsets = self.__types, self.offsets
+        return [
+            TextNode(value, offsets[i], offsets[i + 1], Text(node_id, value, types[text_type]), [])
+            for i, (node_id, text_type, value) in enumerate(zip(self.node_ids, self.types, self._values))
+        ]
+
+
+def collect_text_nodes(source, ignore_tags=None) -> TextNodeTarget:
+    """
+    Parse the given source (a filename, a file object or a bytes/str document) without building a tree.
+    :return TextNodeTarget - the target which holds the concatenated content, the text nodes and the parent table.
+    """
+    parser = etree.XMLParser(target=TextNodeTarget(ignore_tags), remove_comments=True, remove_pis=True)
+    if _is_document(source):
+        return etree.fromstring(source, parser)
+    return etree.parse(source, parser)
+
+
+def _is_document(source) -> bool:
+    """
+    Whether the source is a bytes/str document rather than a filename or a file object.
+    """
+    return isinstance(source, (bytes, str)) and source.lstrip()[:1] in (b'<', '<')
+
+
+def _source_size(source) -> int:
+    """
+    Returns the size of the source in bytes, or 0 for a file object.
+    """
+    if _is_document(source):
+        return len(source) if isinstance(source, bytes) else len(source.encode('utf-8'))
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    return 0
+
+
+def extract_anchor_offsets(
+        source,
+        ignore_tags=None,
+        metrics: Metrics = NULL_METRICS,
+        extract: Callable[[str, Metrics], list[Anchor]] = extract_anchors,
+) -> list[TextNode]:
+    """
+    The tree-free counterpart of extract_anchors_from_xml, for the runs which only need the anchor offsets.
+    The text nodes are collected while parsing, so the parse stage includes the text-node collection.
+    The extract function can be replaced, e.g. by a Deduplicator which reuses the anchors of duplicates.
+    """
+    with metrics.stage('parse'):
+        target = collect_text_nodes(source, ignore_tags)
+    if metrics.enabled:
+        # the size costs a copy of a str document or a stat of a file, so it is only taken when it is recorded.
+        metrics.count('bytes', _source_size(source))
+    metrics.count('nodes', len(target.parents))
+    metrics.count('text_nodes', len(target.node_ids))
+    anchors = extract(target.content, metrics)
+    with metrics.stage('map'):
+        return _attach_anchors(
+            target.text_nodes,
+            anchors,
+            lambda node_id: node_id,
+            target.parents.__getitem__,
+        )
+
 if __name__ == '__main__':
     extract_anchors_from_xml(read_xml('sample.xml').getroot())
@@ -1,10 +1,19 @@
+from __future__ import annotations
+
 import os
-import inspect
 import re
 
 from dataclasses import dataclass
-from lxml import etree
-from lxml.etree import Element, ElementTree
+from typing import TYPE_CHECKING
+
+from hyperlink import lazy_import
+
+if TYPE_CHECKING:
+    from lxml.etree import Element, ElementTree
+
+etree = lazy_import('lxml.etree')
+
+CURRENT_LOCATION = os.path.dirname(os.path.abspath(__file__))
 
 
 @dataclass
@@ -17,15 +26,14 @@ class TextNode:
 
 def read_tree(filename: str) -> ElementTree:
     norm_rel_path = os.path.normpath(filename)
-    current_location = os.path.dirname(os.path.abspath(inspect.stack()[0][1]))
-    file_path = os.path.join(current_location, norm_rel_path)
+    file_path = os.path.join(CURRENT_LOCATION, norm_rel_path)
     return etree.parse(file_path)
 
 
 class XMLContentHelper:
 
     def __init__(self, root: Element, ignore_tags=None):
-        fake_root = Element('fake_root')
+        fake_root = etree.Element('fake_root')
         fake_root.append(root)
 
         self._root = fake_root
@@ -1,8 +1,6 @@
 import logging
 import os
 
-from importmds import ImportHelper
-
 ENV_MODE = os.getenv("ENV_MODE", "test")
 
 def setup_logging():
@@ -20,6 +18,5 @@ def setup_logging():
         )
 
 
-""" side effect: import the src module."""
+""" side effect: set up the logging, the src directory is on the path through the pytest pythonpath."""
 setup_logging()
-ImportHelper().import_src_module()
@@ -0,0 +1,52 @@
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_extractor import AbbreviationResolver, AnchorType, TitleExtractor
+
+
+class AbbreviationResolverTestCase(unittest.TestCase):
+    def resolve(self, content, doc_title=None):
+        anchors = TitleExtractor().extract(content)
+        return AbbreviationResolver().resolve(content, anchors, doc_title)
+
+    def test_bracketed_abbreviation(self):
+        content = "《中华人民共和国公司法》（以下简称《公司法》）规定。依照《公司法》第十条。"
+        anchors = self.resolve(content)
+        self.assertEqual(
+            [(x.value, x.type, x.target and x.target.value) for x in anchors],
+            [
+                ("《中华人民共和国公司法》", AnchorType.TITLE, None),
+                ("《公司法》", AnchorType.ABBREVIATION, "《中华人民共和国公司法》"),
+                ("《公司法》", AnchorType.ABBREVIATION, "《中华人民共和国公司法》"),
+            ],
+        )
+
+    def test_abbreviation_before_definition(self):
+        content = "依照《公司法》。《中华人民共和国公司法》（以下简称《公司法》）"
+        anchors = self.resolve(content)
+        self.assertEqual(anchors[0].type, AnchorType.TITLE)
+        self.assertIsNone(anchors[0].target)
+
+    def test_nearest_preceding_definition(self):
+        content = "《甲法》（简称“本规”）及本规。《乙法》（简称“本规”）及本规。"
+        anchors = [x for x in self.resolve(content) if x.type == AnchorType.ABBREVIATION]
+        self.assertEqual(
+            [(x.start_index, x.target.value) for x in anchors],
+            [(8, "《甲法》"), (13, "《甲法》"), (24, "《乙法》"), (29, "《乙法》")],
+        )
+
+    def test_self_reference(self):
+        content = "《中华人民共和国公司法》（以下简称《公司法》）及《证券法》。该法第二条，本法自公布之日起施行，本法院认为。"
+        anchors = [x for x in self.resolve(content, "中华人民共和国公司法") if x.type == AnchorType.SELF_REF]
+        self.assertEqual(
+            [(x.value, x.target.value) for x in anchors],
+            [("该法", "《证券法》"), ("本法", "中华人民共和国公司法")],
+        )
+
+    def test_not_self_reference(self):
+        content = "《公司法》的基本规定是根本法，日本法和资本法另有规定，应该规定的不予规定。"
+        self.assertEqual([], [x for x in self.resolve(content, "中华人民共和国公司法") if x.type == AnchorType.SELF_REF])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink import anchor_format
+from hyperlink.anchor_extractor import AbbreviationResolver, Anchor, AnchorType, TitleExtractor
+
+CONTENT = "《中华人民共和国公司法》（以下简称《公司法》）规定。依照《公司法》第十条，本法自公布之日起施行。"
+
+
+def extract():
+    return AbbreviationResolver().resolve(CONTENT, TitleExtractor().extract(CONTENT), "中华人民共和国公司法")
+
+
+def summarize(anchors):
+    return [
+        (x.value, x.start_index, x.end_index, x.type, x.version, x.target and (x.target.value, x.target.start_index))
+        for x in anchors
+    ]
+
+
+class AnchorFormatTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        anchors = extract()
+        loaded = anchor_format.loads(anchor_format.dumps(anchors))
+        self.assertEqual(summarize(loaded), summarize(anchors))
+        # the targets within the document are the same objects.
+        self.assertIs(loaded[1].target, loaded[0])
+
+    def test_external_parents_and_targets(self):
+        title = Anchor("中华人民共和国公司法", 0, 10, AnchorType.TITLE)
+        first = Anchor("(2022)京01民初45号", 0, 14, AnchorType.TRIAL_PROGRESS)
+        first.target = title
+        second = Anchor("(2023)京民终123号", 20, 33, AnchorType.TRIAL_PROGRESS)
+        second.parent = first
+        # the parent is in another text node, and its target is out of both.
+        loaded = anchor_format.loads(anchor_format.dumps([second]))
+        self.assertEqual(summarize(loaded), summarize([second]))
+        self.assertEqual(summarize([loaded[0].parent]), summarize([first]))
+        self.assertEqual(summarize([loaded[0].parent.target]), summarize([title]))
+
+    def test_find(self):
+        with anchor_format.AnchorReader(anchor_format.dumps(extract())) as reader:
+            self.assertEqual(len(reader), 4)
+            self.assertEqual(list(reader.find(types=[AnchorType.SELF_REF])), [3])
+            self.assertEqual(list(reader.find(start_index=10, end_index=33)), [1, 2])
+            self.assertEqual([x.value for x in reader.anchors(reader.find(types=[AnchorType.ABBREVIATION]))], ["《公司法》", "《公司法》"])
+
+    def test_mmap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "anchors.bin")
+            anchor_format.write(path, extract())
+            with anchor_format.open_reader(path) as reader:
+                self.assertEqual(summarize(reader.anchors()), summarize(extract()))
+
+    def test_jsonl(self):
+        anchors = extract()
+        self.assertEqual(summarize(anchor_format.from_jsonl(anchor_format.to_jsonl(anchors))), summarize(anchors))
+
+
+if __name__ == "__main__":
+    unittest.main()
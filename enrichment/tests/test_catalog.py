@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.catalog import Catalog, CatalogHandle, DocMeta, build_catalog
+
+COMPANY_LAW = [
+    DocMeta("中华人民共和国公司法(2008修正)", "公司法", 2008),
+    DocMeta("中华人民共和国公司法", "公司法", 2011),
+    DocMeta("中华人民共和国公司法(2019修正)", "公司法", 2019),
+    DocMeta("中华人民共和国公司法(2023修正)", "公司法", 2023),
+]
+CRIMINAL_LAW = [DocMeta("中华人民共和国刑法", "刑法", 1997)]
+
+
+class CatalogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = build_catalog(
+            os.path.join(self.tmp_dir.name, "catalog.bin"), COMPANY_LAW + CRIMINAL_LAW, {"公司法典": "公司法"}
+        )
+        self.catalog = Catalog(self.path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_find(self):
+        find = self.catalog.find
+        self.assertEqual(find("公司法", 2012), DocMeta("中华人民共和国公司法", "公司法", 2011))
+        self.assertEqual(find("公司法(2023修正)", 2023), DocMeta("中华人民共和国公司法(2023修正)", "公司法", 2023))
+        self.assertEqual(find("公司法", 2008), DocMeta("中华人民共和国公司法(2008修正)", "公司法", 2008))
+        self.assertEqual(find("中华人民共和国公司法", 2008), DocMeta("中华人民共和国公司法(2008修正)", "公司法", 2008))
+        self.assertEqual(
+            find("中华人民共和国公司法（2019修正）", 2024), DocMeta("中华人民共和国公司法(2019修正)", "公司法", 2019)
+        )
+        self.assertEqual(find("公司法典", 2024), COMPANY_LAW[-1])
+        self.assertIsNone(find("公司法", 2000))
+        self.assertIsNone(find("证券法", 2024))
+
+    def test_scan(self):
+        text = "依照《中华人民共和国公司法》及刑法。"
+        self.assertEqual(
+            [(text[s:e], self.catalog.revisions(law_id)[0].short_name) for s, e, law_id in self.catalog.scan(text)],
+            [("中华人民共和国公司法", "公司法"), ("刑法", "刑法")],
+        )
+
+    def test_hot_reload(self):
+        handle = CatalogHandle(self.path, check_interval=0)
+        in_flight = handle.current
+        build_catalog(self.path, CRIMINAL_LAW)
+        self.assertIsNot(handle.current, in_flight)
+        self.assertIsNone(handle.current.find("公司法", 2024))
+        # the document in flight keeps the catalog it started with.
+        self.assertEqual(in_flight.find("公司法", 2024), COMPANY_LAW[-1])
+        self.assertFalse(handle.reload())
+
+
+if __name__ == "__main__":
+    unittest.main()
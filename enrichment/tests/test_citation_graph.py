@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_extractor import AnchorType
+from hyperlink.citation_graph import CitationGraph, document_key
+from hyperlink.citation_index import Citation
+
+COMPANY_LAW = "中华人民共和国公司法(2019修正)"
+REGULATION = "公司登记管理条例"
+# the document which is the regulation itself.
+REGULATION_DOC = 4
+
+
+def cite(doc_id, key, article=""):
+    return Citation(AnchorType.TITLE, key, article, doc_id, 0, 1)
+
+
+class CitationGraphTestCase(unittest.TestCase):
+    def setUp(self):
+        self.graph = CitationGraph.from_citations([
+            cite(1, COMPANY_LAW, "第十六条"),
+            cite(1, COMPANY_LAW, "第十六条"),
+            cite(2, COMPANY_LAW, "第十六条"),
+            cite(2, COMPANY_LAW, "第二条"),
+            cite(3, REGULATION, "第一条"),
+            # the regulation itself cites the company law.
+            cite(REGULATION_DOC, COMPANY_LAW),
+        ], revisions={REGULATION_DOC: REGULATION})
+
+    def test_most_cited(self):
+        self.assertEqual(self.graph.most_cited(1), [(COMPANY_LAW, "第十六条", 3)])
+        self.assertEqual(self.graph.most_cited(1, by_article=False), [(COMPANY_LAW, "", 5)])
+
+    def test_affected_by(self):
+        self.assertEqual(self.graph.affected_by(COMPANY_LAW), {document_key(1), document_key(2), document_key(3), REGULATION})
+        self.assertEqual(self.graph.affected_by(REGULATION), {document_key(3)})
+
+    def test_document_keys(self):
+        # a doc id never collides with a revision key, even if the key is a number.
+        graph = CitationGraph.from_citations([cite(1, "1"), cite(2, "1")])
+        self.assertEqual(graph.affected_by("1"), {document_key(1), document_key(2)})
+        self.assertEqual(graph.affected_by(document_key(1)), set())
+
+    def test_update_document(self):
+        self.graph.update_document(document_key(2), [cite(2, REGULATION, "第二条")])
+        self.assertEqual(
+            sorted(self.graph.citations(COMPANY_LAW)), [(document_key(1), "第十六条", 2), (REGULATION, "", 1)]
+        )
+        expected = [(document_key(2), "第二条", 1), (document_key(3), "第一条", 1)]
+        self.assertEqual(sorted(self.graph.citations(REGULATION)), expected)
+        self.graph.compact()
+        self.assertEqual(sorted(self.graph.citations(REGULATION)), expected)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graph.bin")
+            self.graph.save(path)
+            graph = CitationGraph.load(path)
+        self.assertEqual(graph.most_cited(2), self.graph.most_cited(2))
+        self.assertEqual(graph.affected_by(COMPANY_LAW), self.graph.affected_by(COMPANY_LAW))
+
+    def test_queries_merge_the_overlay(self):
+        with mock.patch.object(CitationGraph, "compact") as compact:
+            for doc_id in range(5):
+                self.graph.update_document(document_key(doc_id + 10), [cite(0, REGULATION, "第三条")] * 4)
+                self.assertEqual(self.graph.most_cited(1), [(REGULATION, "第三条", 4 * (doc_id + 1))])
+            self.graph.update_document(document_key(1), [])
+            self.assertEqual(self.graph.most_cited(1, by_article=False), [(REGULATION, "", 21)])
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "graph.bin")
+                self.graph.save(path)
+                graph = CitationGraph.load(path)
+            compact.assert_not_called()
+        self.assertEqual(graph.most_cited(3), self.graph.most_cited(3))
+        self.assertEqual(sorted(graph.citations(COMPANY_LAW)), sorted(self.graph.citations(COMPANY_LAW)))
+        self.assertEqual(sorted(graph.citations(REGULATION)), sorted(self.graph.citations(REGULATION)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_extractor import AnchorType
+from hyperlink.citation_index import (
+    Citation,
+    CitationIndex,
+    Posting,
+    decode_postings,
+    encode_postings,
+    merge_segments,
+)
+
+COMPANY_LAW = "中华人民共和国公司法(2019修正)"
+
+
+class CitationIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index = CitationIndex(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_postings_codec(self):
+        postings = [(0, 3, 8), (0, 20, 25), (7, 1, 4), (300, 100000, 100010)]
+        encoded = encode_postings(postings)
+        self.assertEqual(decode_postings(encoded, 0, len(encoded)), [Posting(*x) for x in postings])
+
+    def test_lookup(self):
+        self.index.append([
+            Citation(AnchorType.TITLE, COMPANY_LAW, "第十六条", 2, 10, 20),
+            Citation(AnchorType.TITLE, COMPANY_LAW, "第十六条", 1, 5, 15),
+            Citation(AnchorType.TITLE, COMPANY_LAW, "", 1, 30, 40),
+        ])
+        self.assertEqual(
+            self.index.lookup(AnchorType.TITLE, COMPANY_LAW, "第十六条"),
+            [Posting(1, 5, 15), Posting(2, 10, 20)],
+        )
+        self.assertEqual(self.index.documents(AnchorType.TITLE, COMPANY_LAW), [1])
+        self.assertEqual(self.index.lookup(AnchorType.TITLE, COMPANY_LAW, "第一条"), [])
+
+    def test_append_and_compact(self):
+        self.index.append([Citation(AnchorType.TITLE, COMPANY_LAW, "第十六条", 2, 10, 20)])
+        self.index.append([Citation(AnchorType.TITLE, COMPANY_LAW, "第十六条", 1, 5, 15)])
+        with CitationIndex(self.tmp_dir.name) as reader:
+            self.assertEqual(reader.documents(AnchorType.TITLE, COMPANY_LAW, "第十六条"), [1, 2])
+
+        self.index.compact()
+        self.assertEqual([x for x in os.listdir(self.tmp_dir.name) if x.endswith(".cidx")], ["00000000-00000001.cidx"])
+        self.assertEqual(self.index.documents(AnchorType.TITLE, COMPANY_LAW, "第十六条"), [1, 2])
+
+    def test_refresh_after_compaction(self):
+        for doc_id in range(3):
+            self.index.append([Citation(AnchorType.TITLE, COMPANY_LAW, "第十六条", doc_id, 10, 20)])
+        with CitationIndex(self.tmp_dir.name) as reader:
+            self.assertEqual(len(reader.segments), 3)
+            self.index.compact()
+            reader.refresh()
+            self.assertEqual(len(reader.segments), 1)
+            self.assertEqual(
+                reader.lookup(AnchorType.TITLE, COMPANY_LAW, "第十六条"),
+                [Posting(0, 10, 20), Posting(1, 10, 20), Posting(2, 10, 20)],
+            )
+            # the segments appended after the compaction follow the merged one.
+            self.index.append([Citation(AnchorType.TITLE, COMPANY_LAW, "第十六条", 3, 10, 20)])
+            reader.refresh()
+            self.assertEqual(reader.documents(AnchorType.TITLE, COMPANY_LAW, "第十六条"), [0, 1, 2, 3])
+
+    def test_concurrent_appends(self):
+        def append(doc_id):
+            with CitationIndex(self.tmp_dir.name) as writer:
+                writer.append([Citation(AnchorType.TITLE, COMPANY_LAW, "第十六条", doc_id, 10, 20)])
+
+        # every writer has its own lock file descriptor, as the writers in separate processes do.
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(append, range(32)))
+            executor.submit(self.index.compact).result()
+        self.index.refresh()
+        self.assertEqual(self.index.documents(AnchorType.TITLE, COMPANY_LAW, "第十六条"), list(range(32)))
+
+    def test_merged_segment_covers_the_old_ones(self):
+        self.index.append([Citation(AnchorType.TITLE, COMPANY_LAW, "第十六条", 1, 10, 20)])
+        self.index.append([Citation(AnchorType.TITLE, COMPANY_LAW, "第一条", 2, 10, 20)])
+        # a compaction which is interrupted after the merged segment is written.
+        merge_segments(os.path.join(self.tmp_dir.name, "00000000-00000001.cidx"), self.index.segments)
+        with CitationIndex(self.tmp_dir.name) as reader:
+            self.assertEqual([os.path.basename(x.path) for x in reader.segments], ["00000000-00000001.cidx"])
+            self.assertEqual(reader.lookup(AnchorType.TITLE, COMPANY_LAW, "第十六条"), [Posting(1, 10, 20)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_extractor import AnchorType
+from hyperlink.dedup import Deduplicator, minhash, similarity
+from hyperlink.metrics import Metrics
+from hyperlink.xml_text_helper import extract_anchor_offsets, extract_anchors
+
+DEFINITION = "依照《中华人民共和国公司法》（以下简称《公司法》）第一条的规定。"
+SENTENCES = [
+    sentence
+    for i in range(1, 40)
+    for sentence in (f"依照《公司法》第{i}条的规定。", f"本院（2023）京01民终{i}号判决认为，上诉理由不能成立。")
+]
+DOCUMENT = DEFINITION + "".join(SENTENCES) + "《公司法》第十条所称公司。本法自公布之日起施行。"
+
+
+def summarize(anchors):
+    return sorted((x.start_index, x.end_index, x.value, x.type) for x in anchors)
+
+
+class DeduplicatorTestCase(unittest.TestCase):
+    def test_minhash(self):
+        self.assertEqual(similarity(minhash(DOCUMENT), minhash(DOCUMENT)), 1.0)
+        edited = DOCUMENT.replace(SENTENCES[5], "本院认为，上诉理由不能成立。")
+        self.assertGreater(similarity(minhash(DOCUMENT), minhash(edited)), 0.8)
+        self.assertLess(similarity(minhash(DOCUMENT), minhash("完全不同的一段文字，没有任何相同的句子。" * 20)), 0.2)
+
+    def test_exact_duplicate(self):
+        dedup = Deduplicator()
+        first = dedup(DOCUMENT)
+        second = dedup(DOCUMENT)
+        self.assertEqual(summarize(first), summarize(extract_anchors(DOCUMENT)))
+        self.assertEqual(summarize(second), summarize(first))
+        self.assertEqual(dedup.stats, {"documents": 2, "exact": 1, "near": 0, "enriched": 1})
+        self.assertEqual(dedup.skipped_ratio, 0.5)
+        # the reused anchors are fresh objects.
+        self.assertTrue(all(x is not y for x, y in zip(first, second)))
+
+        # the copy differs only in a zero-width space, which is removed by the normalization.
+        copy = DOCUMENT.replace("本院", "\u200b本院", 1)
+        self.assertEqual(summarize(dedup(copy)), summarize(extract_anchors(copy)))
+        self.assertEqual(dedup.stats["near"], 1)
+
+    def test_near_duplicate(self):
+        dedup = Deduplicator()
+        dedup(DOCUMENT)
+        edited = "转载自某网站。" + DOCUMENT.replace(SENTENCES[5], "本院（2024）京01民终999号判决认为，原判并无不当。")
+        metrics = Metrics()
+        anchors = dedup(edited, metrics)
+        self.assertEqual(dedup.stats["near"], 1)
+        self.assertEqual(metrics.counters["duplicates_near"], 1)
+        expected = extract_anchors(edited)
+        self.assertEqual(summarize(anchors), summarize(expected))
+        # the trial-progress chain and the abbreviation targets are remapped to the copies.
+        by_start = {x.start_index: x for x in anchors}
+        def ordered(values):
+            return sorted(values, key=lambda x: (x.start_index, x.end_index))
+
+        for anchor, reused in zip(ordered(expected), ordered(anchors)):
+            if anchor.parent is not None:
+                self.assertIs(by_start[anchor.parent.start_index], reused.parent)
+        aliases = [x for x in anchors if x.type == AnchorType.ABBREVIATION]
+        self.assertTrue(aliases and all(x.target is None or x.target in anchors for x in aliases[1:]))
+
+    def test_context_changed(self):
+        # the changed sentences hold a definition, a title or a self-reference, so the copies are enriched again.
+        edits = [
+            DOCUMENT.replace(DEFINITION, "依照有关规定。"),
+            DOCUMENT.replace(DEFINITION, ""),
+            DOCUMENT.replace(SENTENCES[5], "依照《中华人民共和国民法典》第五条。"),
+            DOCUMENT.replace(SENTENCES[5], "本法第五条另有规定的除外。"),
+        ]
+        for edited in edits:
+            dedup = Deduplicator()
+            dedup(DOCUMENT)
+            self.assertEqual(summarize(extract_anchors(edited)), summarize(dedup(edited)))
+            self.assertEqual(0, dedup.stats["near"])
+            self.assertEqual(2, dedup.stats["enriched"])
+
+    def test_too_different(self):
+        dedup = Deduplicator(max_changed_ratio=0.001)
+        dedup(DOCUMENT)
+        edited = DOCUMENT.replace(SENTENCES[5], "本院认为，上诉理由不能成立。")
+        self.assertEqual(summarize(dedup(edited)), summarize(extract_anchors(edited)))
+        self.assertEqual(dedup.stats, {"documents": 2, "exact": 0, "near": 0, "enriched": 2})
+
+    def test_eviction(self):
+        dedup = Deduplicator(capacity=1)
+        dedup(DOCUMENT)
+        dedup("另一份文书。")
+        dedup(DOCUMENT)
+        self.assertEqual(dedup.stats["enriched"], 3)
+
+    def test_extract_anchor_offsets(self):
+        source = f"<doc><p>{DOCUMENT}</p></doc>".encode("utf-8")
+        dedup = Deduplicator()
+        extract_anchor_offsets(source, extract=dedup)
+
+        def nodes(text_nodes):
+            return [(x.value, summarize(x.anchors)) for x in text_nodes]
+
+        self.assertEqual(nodes(extract_anchor_offsets(source, extract=dedup)), nodes(extract_anchor_offsets(source)))
+        self.assertEqual(dedup.stats["exact"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
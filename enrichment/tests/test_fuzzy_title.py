@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_extractor import TitleExtractor
+from hyperlink.fuzzy_title import FuzzyTitleResolver, NGramIndex, bounded_edit_distance
+
+CATALOG = ["中华人民共和国公司法", "中华人民共和国证券法", "中华人民共和国刑法", "中华人民共和国民法典", "刑法", "民法"]
+
+
+class BoundedEditDistanceTestCase(unittest.TestCase):
+    def test_within_bound(self):
+        self.assertEqual(bounded_edit_distance("公司去", "公司法", 1), 1)
+        self.assertEqual(bounded_edit_distance("公司法", "中华人民共和国公司法", 7), 7)
+
+    def test_beyond_bound(self):
+        self.assertEqual(bounded_edit_distance("公司法", "中华人民共和国公司法", 2), -1)
+        self.assertEqual(bounded_edit_distance("刑法解释", "民法典", 1), -1)
+
+
+class FuzzyTitleResolverTestCase(unittest.TestCase):
+    def setUp(self):
+        self.resolver = FuzzyTitleResolver(CATALOG)
+
+    def test_match(self):
+        self.assertEqual(self.resolver.match("中华人民共和国公司去"), "中华人民共和国公司法")
+        self.assertEqual(self.resolver.match("中华人民共合国证卷法"), "中华人民共和国证券法")
+        self.assertEqual(self.resolver.match("中华人民共和国公司法"), "中华人民共和国公司法")
+        # the short titles are only matched exactly.
+        self.assertIsNone(self.resolver.match("宪法"))
+
+    def test_resolve(self):
+        content = "依照《中华人民共和国公司去》和《中华人民共和国刑法》及《某某办法》。"
+        anchors = TitleExtractor().extract(content)
+        self.assertEqual(self.resolver.resolve(anchors), 0)
+        self.assertEqual([x.target and x.target.value for x in anchors], ["《中华人民共和国公司法》", None, None])
+
+    def test_budget(self):
+        resolver = FuzzyTitleResolver(CATALOG, budget_seconds=-1)
+        anchors = TitleExtractor().extract("《中华人民共和国公司去》《中华人民共和国刑法》")
+        self.assertEqual(resolver.resolve(anchors), 1)
+        self.assertIsNone(anchors[0].target)
+
+    def test_deadline_within_match(self):
+        anchors = TitleExtractor().extract("《中华人民共和国公司去》")
+        now = [0.0]
+        resolver = FuzzyTitleResolver(CATALOG, budget_seconds=0.5, clock=lambda: now[0])
+
+        def slow_distance(*args):
+            # every verification of a candidate takes longer than the whole budget.
+            now[0] += 1.0
+            return bounded_edit_distance(*args)
+
+        with mock.patch("hyperlink.fuzzy_title.bounded_edit_distance", side_effect=slow_distance):
+            self.assertEqual(resolver.resolve(anchors), 1)
+        self.assertIsNone(anchors[0].target)
+        # the match cut short is not cached, the next document resolves it.
+        self.assertEqual(resolver.resolve(anchors), 0)
+        self.assertEqual(anchors[0].target.value, "《中华人民共和国公司法》")
+
+
+class NGramIndexTestCase(unittest.TestCase):
+    def test_common_bigrams_only(self):
+        index = NGramIndex([f"中华人民共和国{chr(0x4e00 + i)}{chr(0x5000 + i)}法" for i in range(1000)])
+        self.assertEqual(index.shortlist("中华人民共和国", 10, 2), [])
+        self.assertEqual(index.shortlist(index.names[5], 10, 2)[0], index.names[5])
+
+    def test_deadline(self):
+        index = NGramIndex(["公司法", "公司登记管理条例", "证券法"])
+        # the rarest posting list is always counted, the others are skipped once the deadline passes.
+        self.assertEqual(index.shortlist("公司法", 10, 2, deadline=0.0, clock=lambda: 1.0), ["公司法"])
+        self.assertEqual(index.shortlist("公司法", 10, 2), ["公司法", "公司登记管理条例"])
+
+
+if __name__ == "__main__":
+    unittest.main()
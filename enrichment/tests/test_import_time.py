@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+
+SRC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+# The budget of the cumulative import time of the entry modules in microseconds.
+IMPORT_TIME_BUDGET_US = int(os.getenv("IMPORT_TIME_BUDGET_US", 100_000))
+HEAVY_MODULES = ("lxml", "boto3", "ahocorasick")
+
+
+def importtime(statement: str) -> dict[str, int]:
+    """
+    Run the statement in a fresh interpreter with `-X importtime`,
+    and return the cumulative import time of each imported module in microseconds.
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_PATH)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = {}
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        result[name.strip()] = int(cumulative)
+    return result
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    def test_heavy_modules_are_lazy(self):
+        modules = importtime("import hyperlink.xml_text_helper, xml_extractor.extractor")
+        self.assertFalse([x for x in modules if x.split(".")[0] in HEAVY_MODULES])
+
+    def test_import_time_budget(self):
+        modules = importtime("import hyperlink.xml_text_helper")
+        self.assertLess(modules["hyperlink.xml_text_helper"], IMPORT_TIME_BUDGET_US)
+        self.assertLess(modules["hyperlink"], IMPORT_TIME_BUDGET_US)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import re
+import json
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_format import write
+from hyperlink.metrics import Metrics, SlowDocumentCapture, NULL_METRICS
+from hyperlink.xml_text_helper import extract_anchor_offsets, extract_anchors
+
+DOCUMENT = "<p>依照<b>《中华人民共和国公司法》</b>第十条。本院（2023）京01民终123号判决。</p>".encode("utf-8")
+
+
+class MetricsTestCase(unittest.TestCase):
+    def test_stages_and_counters(self):
+        metrics = Metrics()
+        text_nodes = extract_anchor_offsets(DOCUMENT, metrics=metrics)
+        self.assertEqual(
+            set(metrics.timings),
+            {"parse", "normalize", "split", "extract", "resolve", "rebase", "map"},
+        )
+        self.assertTrue(all(count == 1 for count, _, _ in metrics.timings.values()))
+        self.assertEqual(metrics.counters["bytes"], len(DOCUMENT))
+        self.assertEqual(metrics.counters["nodes"], 2)
+        self.assertEqual(metrics.counters["text_nodes"], len(text_nodes))
+        self.assertEqual(metrics.counters["sentences"], 2)
+        self.assertEqual(metrics.counters["anchors"], 2)
+
+    def test_null_metrics(self):
+        self.assertEqual(
+            [x.value for x in extract_anchors("《公司法》第十条。")],
+            [x.value for x in extract_anchors("《公司法》第十条。", NULL_METRICS)],
+        )
+        other = Metrics()
+        other.observe("parse", 1.0)
+        other.count("documents")
+        other.sample("read_queue_depth", 1)
+        self.assertIs(NULL_METRICS.merge(other), NULL_METRICS)
+        self.assertEqual(NULL_METRICS.timings, {})
+        self.assertEqual(dict(NULL_METRICS.counters), {})
+        self.assertEqual(NULL_METRICS.samples, {})
+
+    def test_size_only_with_metrics(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "document.xml")
+            with open(path, "wb") as file:
+                file.write(DOCUMENT)
+            with mock.patch("hyperlink.xml_text_helper.os.path.getsize", wraps=os.path.getsize) as getsize:
+                extract_anchor_offsets(path)
+                getsize.assert_not_called()
+                metrics = Metrics()
+                extract_anchor_offsets(path, metrics=metrics)
+        self.assertEqual(metrics.counters["bytes"], len(DOCUMENT))
+        getsize.assert_called_once_with(path)
+
+    def test_merge_and_export(self):
+        first, second = Metrics(), Metrics()
+        first.observe("parse", 0.5)
+        second.observe("parse", 1.5)
+        second.count("documents", 2)
+        first.sample("read_queue_depth", 4)
+        second.sample("read_queue_depth", 2)
+        merged = first.merge(pickle.loads(pickle.dumps(second)))
+        self.assertEqual(merged.timings["parse"], [2, 2.0, 1.5])
+        self.assertEqual(merged.samples["read_queue_depth"], [2, 6, 4])
+        self.assertEqual(json.loads(merged.to_json())["counters"]["documents"], 2)
+
+        text = merged.to_prometheus()
+        self.assertIn('enrichment_stage_seconds_sum{stage="parse"} 2.000000000', text)
+        self.assertIn('enrichment_stage_seconds_count{stage="parse"} 2', text)
+        self.assertIn('enrichment_stage_max_seconds{stage="parse"} 1.500000000', text)
+        self.assertIn("enrichment_documents_total 2", text)
+        self.assertIn('enrichment_read_queue_depth{stat="mean"} 3', text)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "enrichment.prom")
+            merged.write_textfile(path)
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(file.read(), text)
+            self.assertEqual(os.listdir(directory), ["enrichment.prom"])
+
+    def test_write_stage(self):
+        metrics = Metrics()
+        with tempfile.TemporaryDirectory() as directory:
+            write(os.path.join(directory, "anchors.bin"), extract_anchors("《公司法》第十条。"), metrics)
+            self.assertEqual(metrics.timings["write"][0], 1)
+            self.assertEqual(metrics.counters["bytes_written"], os.path.getsize(os.path.join(directory, "anchors.bin")))
+
+    def test_slow_document_capture(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fast = SlowDocumentCapture(directory, threshold_seconds=60)
+            with fast.document("fast.xml", DOCUMENT) as metrics:
+                extract_anchor_offsets(DOCUMENT, metrics=metrics)
+            self.assertEqual(os.listdir(directory), [])
+            self.assertEqual(fast.metrics.counters["documents"], 1)
+            self.assertEqual(fast.metrics.timings["parse"][0], 1)
+
+            slow = SlowDocumentCapture(directory, threshold_seconds=0, profile=True)
+            # the documents of the same base name in different directories are captured apart.
+            for name in ("a/slow doc.xml", "b/slow doc.xml"):
+                with slow.document(name, DOCUMENT) as metrics:
+                    extract_anchor_offsets(DOCUMENT, metrics=metrics)
+            stems = sorted({x.rsplit(".", 1)[0] for x in os.listdir(directory)})
+            self.assertEqual(len(os.listdir(directory)), 6)
+            self.assertEqual(len(stems), 2)
+            self.assertTrue(all(re.fullmatch(r"slow_doc\.xml\.[0-9a-f]{8}", x) for x in stems))
+            with open(os.path.join(directory, f"{stems[0]}.src"), "rb") as file:
+                self.assertEqual(file.read(), DOCUMENT)
+            with open(os.path.join(directory, f"{stems[0]}.json"), encoding="utf-8") as file:
+                self.assertIn("parse", json.load(file)["stages"])
+            self.assertEqual(slow.metrics.counters["slow_documents"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_extractor import TitleExtractor
+from hyperlink.normalizer import NormalizedText
+
+
+class NormalizedTextTestCase(unittest.TestCase):
+    def test_normalize(self):
+        normalized = NormalizedText("《公司法（２０１９修正）》〔２０２３〕　第十条")
+        self.assertEqual(normalized.text, "《公司法(2019修正)》[2023] 第十条")
+        self.assertEqual(normalized.to_original(5), 5)
+
+    def test_offsets_of_removed_chars(self):
+        original = "依照\u200b《公司法\ufeff（2019修正）》第十条"
+        normalized = NormalizedText(original)
+        self.assertEqual(normalized.text, "依照《公司法(2019修正)》第十条")
+        self.assertEqual(normalized.to_original(0), 0)
+        self.assertEqual(normalized.to_original(2), 3)
+        self.assertEqual(normalized.to_original(6), 8)
+
+    def test_rebase(self):
+        original = "依照\u200b《公司法\ufeff（2019修正）》第十条"
+        normalized = NormalizedText(original)
+        anchors = normalized.rebase(TitleExtractor().extract(normalized.text))
+        self.assertEqual(anchors[0].value, "《公司法(2019修正)》")
+        self.assertEqual(original[anchors[0].start_index:anchors[0].end_index], "《公司法\ufeff（2019修正）》")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import orjson
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.pipeline import Pipeline, PipelineConfig, directory_writer, enrich_document
+
+DOCUMENTS = {
+    f"{i}.xml": f"<doc><p>依照<b>《中华人民共和国公司法》</b>第{i}条。本院（2023）京01民终{i}号判决。</p></doc>".encode("utf-8")
+    for i in range(1, 21)
+}
+
+
+class PipelineTestCase(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = ProcessPoolExecutor(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.shutdown()
+
+    def test_enrich_document(self):
+        result, metrics = enrich_document(DOCUMENTS["1.xml"])
+        lines = [orjson.loads(x) for x in result.splitlines()]
+        self.assertEqual(
+            [(x["node_id"], x["type"], [a["value"] for a in x["anchors"]]) for x in lines],
+            [(2, "text", ["《中华人民共和国公司法》"]), (2, "tail", ["(2023)京01民终1号"])],
+        )
+        self.assertIn("parse", metrics.timings)
+
+    async def test_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sources = []
+            for name, data in DOCUMENTS.items():
+                sources.append(os.path.join(directory, name))
+                with open(sources[-1], "wb") as file:
+                    file.write(data)
+            output = os.path.join(directory, "output")
+            config = PipelineConfig(readers=3, workers=1, writers=2, queue_size=2, sample_interval=0.001)
+            pipeline = Pipeline(config, write=directory_writer(output, root=directory))
+            metrics = await pipeline.run(sources, self.executor)
+
+            self.assertEqual(pipeline.failures, [])
+            self.assertEqual(metrics.counters["documents"], len(DOCUMENTS))
+            self.assertEqual(metrics.counters["bytes_read"], sum(map(len, DOCUMENTS.values())))
+            self.assertEqual(sorted(os.listdir(output)), sorted(f"{x}.anchors.jsonl" for x in DOCUMENTS))
+            with open(os.path.join(output, "7.xml.anchors.jsonl"), "rb") as file:
+                self.assertEqual(file.read(), enrich_document(DOCUMENTS["7.xml"])[0])
+
+            for stage in ("read", "enrich", "write", "parse", "extract", "map"):
+                self.assertEqual(metrics.timings[stage][0], len(DOCUMENTS), stage)
+            for queue in ("read", "enrich", "write"):
+                self.assertLessEqual(metrics.samples[f"{queue}_queue_depth"][2], config.queue_size)
+            self.assertIn('enrichment_enrich_queue_depth{stat="max"}', metrics.to_prometheus())
+
+    async def test_relative_paths(self):
+        async def read(name):
+            return DOCUMENTS[os.path.basename(name)]
+
+        sources = ["2023/a/1.xml", "2024/b/1.xml", "/2024/c/2.xml"]
+        with tempfile.TemporaryDirectory() as directory:
+            pipeline = Pipeline(PipelineConfig(workers=1, writers=3), read=read, write=directory_writer(directory))
+            await pipeline.run([*sources, "../1.xml"], self.executor)
+            written = sorted(
+                os.path.relpath(os.path.join(parent, x), directory)
+                for parent, _, names in os.walk(directory) for x in names
+            )
+        self.assertEqual(written, sorted(os.path.normpath(x.lstrip("/")) + ".anchors.jsonl" for x in sources))
+        self.assertEqual([x for x, _ in pipeline.failures], ["../1.xml"])
+
+    async def test_failures_and_async_sources(self):
+        written = {}
+
+        async def read(name):
+            await asyncio.sleep(0.001)
+            if name == "missing.xml":
+                raise FileNotFoundError(name)
+            return DOCUMENTS.get(name, b"<doc><p>unclosed</doc>")
+
+        async def write(name, data):
+            written[name] = data
+
+        async def sources():
+            for name in ["1.xml", "missing.xml", "malformed.xml", "2.xml"]:
+                yield name
+
+        pipeline = Pipeline(PipelineConfig(readers=2, workers=1), read=read, write=write)
+        metrics = await pipeline.run(sources(), self.executor)
+        self.assertEqual(sorted(written), ["1.xml", "2.xml"])
+        self.assertEqual(sorted(x for x, _ in pipeline.failures), ["malformed.xml", "missing.xml"])
+        self.assertEqual(metrics.counters["errors"], 2)
+        self.assertEqual(metrics.counters["documents"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_extractor import SentenceSplitter
+from hyperlink.xml_text_helper import extract_anchors_by_sentence
+
+
+class SentenceSplitterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.splitter = SentenceSplitter(["。"])
+
+    def test_spans(self):
+        text = "第一句。第二句。第三句"
+        self.assertEqual(list(self.splitter.spans(text)), [(0, 4), (4, 8), (8, 11)])
+        self.assertEqual(self.splitter.split(text), ["第一句。", "第二句。", "第三句"])
+
+    def test_spans_without_trailing_sentence(self):
+        self.assertEqual(list(self.splitter.spans("第一句。")), [(0, 4)])
+        self.assertEqual(list(self.splitter.spans("")), [])
+
+    def test_separator_within_pair(self):
+        text = "根据《关于。的规定》办理。其他"
+        self.assertEqual(self.splitter.split(text), ["根据《关于。的规定》办理。", "其他"])
+
+    def test_pair_not_closed(self):
+        text = "根据《关于。的规定。其他"
+        self.assertEqual(self.splitter.split(text), ["根据《关于。", "的规定。", "其他"])
+
+    def test_extract_anchors_by_sentence(self):
+        text = "依照《公司法》。根据《关于。的规定》办理。"
+        anchors = extract_anchors_by_sentence(text)
+        self.assertEqual(
+            [(x.value, x.start_index, x.end_index) for x in anchors],
+            [("《公司法》", 2, 7), ("《关于。的规定》", 10, 18)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import orjson
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.server import EnrichmentServer, ServerConfig
+
+
+class EnrichmentServerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "enrichment.sock")
+        config = ServerConfig(workers=1, max_request_bytes=256 * 1024, max_connection_requests=2)
+        self.server = await EnrichmentServer(config).start(self.path)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        self.tmp_dir.cleanup()
+
+    async def request(self, *requests):
+        reader, writer = await asyncio.open_unix_connection(self.path)
+        for request in requests:
+            writer.write(request if isinstance(request, bytes) else orjson.dumps(request) + b"\n")
+        await writer.drain()
+        responses = [orjson.loads(await reader.readline()) for _ in requests]
+        writer.close()
+        return sorted(responses, key=lambda x: str(x["id"]))
+
+    async def test_enrich(self):
+        responses = await self.request(
+            {"id": 1, "content": "依照《公司法》。"},
+            {"id": 2, "xml": "<p>依照<b>《刑法》</b>。</p>"},
+        )
+        self.assertEqual(
+            [[(x["value"], x["start_index"], x["type"]) for x in r["anchors"]] for r in responses],
+            [[("《公司法》", 2, "TITLE")], [("《刑法》", 2, "TITLE")]],
+        )
+        self.assertEqual(self.server.stats["requests"], 2)
+
+    async def test_errors(self):
+        responses = await self.request(b"not json\n", {"id": 1, "content": "依照《公司法》。", "deadline_ms": 0.001})
+        self.assertEqual(responses[0]["error"], "deadline exceeded")
+        self.assertTrue(responses[1]["error"].startswith("invalid request"))
+
+    async def test_invalid_requests(self):
+        responses = await self.request(
+            b"[1, 2]\n",
+            {"id": 1, "content": "依照《公司法》。", "deadline_ms": "soon"},
+            {"id": 2, "content": ["依照《公司法》。"]},
+            {"id": 3, "content": "依照《公司法》。"},
+        )
+        self.assertEqual(
+            [(x["id"], x.get("error")) for x in responses],
+            [
+                (1, 'invalid request: "deadline_ms" must be a number'),
+                (2, 'invalid request: "content" must be a string'),
+                (3, None),
+                (None, "invalid request: a request must be a JSON object"),
+            ],
+        )
+
+    async def test_large_requests(self):
+        content = "依照《公司法》。" + "本院认为。" * 12_000
+        responses = await self.request(
+            {"id": 1, "content": content},
+            {"id": 2, "content": content * 3},
+            {"id": 3, "content": "依照《刑法》。"},
+        )
+        # a request beyond max_request_bytes is answered with an error, and the connection goes on.
+        self.assertEqual([x["anchors"][0]["value"] for x in responses[:2]], ["《公司法》", "《刑法》"])
+        self.assertEqual(responses[2]["id"], None)
+        self.assertTrue(responses[2]["error"].startswith("request too large"))
+
+    async def test_connection_backpressure(self):
+        responses = await self.request(*({"id": i, "content": f"依照《公司法》第{i}条。"} for i in range(20)))
+        self.assertEqual(sorted(x["id"] for x in responses), list(range(20)))
+        self.assertTrue(all(x["anchors"] for x in responses))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from lxml import etree
+
+from hyperlink.xml_text_helper import (
+    CURRENT_LOCATION,
+    Texts,
+    collect_text_nodes,
+    extract_anchor_offsets,
+    extract_anchors_from_xml,
+    read_xml,
+)
+
+SAMPLE = os.path.join(CURRENT_LOCATION, "sample.xml")
+
+
+def summarize(text_nodes):
+    return [
+        (x.value, x.start_index, x.end_index, x.text.node_id, x.text.type, [(a.value, a.start_index) for a in x.anchors])
+        for x in text_nodes
+    ]
+
+
+class TextNodeTargetTestCase(unittest.TestCase):
+    def test_same_as_tree(self):
+        expected = extract_anchors_from_xml(read_xml("sample.xml").getroot())
+        self.assertEqual(summarize(extract_anchor_offsets(SAMPLE)), summarize(expected))
+
+    def test_same_as_tree_nested(self):
+        document = "<doc><a><c>x</c></a><p>见《公<b>y</b>司法》。</p><note>z</note>后</doc>"
+        expected = extract_anchors_from_xml(etree.fromstring(document))
+        actual = extract_anchor_offsets(document)
+        self.assertEqual(summarize(actual), summarize(expected))
+        self.assertEqual([(x.value, x.text.node_id) for x in actual], [("x", 2), ("见《公", 3), ("y", 4), ("司法》。", 4), ("z", 5), ("后", 5)])
+        # the anchor is attached to the text nodes it starts and ends within.
+        self.assertEqual([[a.value for a in x.anchors] for x in actual][1:4], [["《公y司法》"], [], ["《公y司法》"]])
+
+    def test_same_as_tree_with_comments(self):
+        document = "<doc><!-- c --><p>见《公<!-- d -->司法》。</p><?pi x?>后<!-- e -->续<note>z<!-- f --></note></doc>"
+        expected = extract_anchors_from_xml(etree.fromstring(document))
+        actual = extract_anchor_offsets(document)
+        self.assertEqual(summarize(actual), summarize(expected))
+        self.assertEqual([(x.value, x.start_index, x.text.node_id) for x in actual], [("见《公司法》。", 0, 1), ("后续", 7, 1), ("z", 9, 2)])
+        self.assertEqual([a.value for a in actual[0].anchors], ["《公司法》"])
+        self.assertEqual(Texts(etree.fromstring(document)).get_node(2).tag, "note")
+
+    def test_preorder_node_ids(self):
+        target = collect_text_nodes("<p>a<b>b<c>c</c>d</b>e<f>f</f></p>")
+        self.assertEqual(target.content, "abcdef")
+        self.assertEqual(
+            [(x.value, x.text.node_id, x.text.type) for x in target.text_nodes],
+            [("a", 0, "text"), ("b", 1, "text"), ("c", 2, "text"), ("d", 2, "tail"), ("e", 1, "tail"), ("f", 3, "text")],
+        )
+        self.assertEqual(list(target.parents), [-1, 0, 1, 0])
+
+    def test_ignore_tags(self):
+        target = collect_text_nodes("<p>a<note>b<c>c</c>d</note>e<f>f</f></p>", ignore_tags=["note"])
+        self.assertEqual(target.content, "af")
+        self.assertEqual([x.text.node_id for x in target.text_nodes], [0, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import sideeffects  # noqa: F401 - It's a side-effects module.
+from hyperlink.anchor_extractor import AnchorType
+from hyperlink.trial_progress import CaseNumber, TrialProgressExtractor, TrialStage
+
+
+class TrialProgressExtractorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.extractor = TrialProgressExtractor()
+
+    def test_brackets(self):
+        for content in ("（2023）京01民终123号", "(2023)京01民终123号", "〔2023〕京01民终123号", "[2023]京01民终123号"):
+            anchors = self.extractor.extract(content)
+            self.assertEqual(len(anchors), 1, content)
+            self.assertEqual(anchors[0].type, AnchorType.TRIAL_PROGRESS)
+            self.assertEqual(anchors[0].case_number, CaseNumber(2023, "京01", "1101", "民终", 123))
+            self.assertEqual(anchors[0].case_number.key, "（2023）京01民终123号")
+
+    def test_stage(self):
+        anchors = self.extractor.extract("（2022）京01民初45号，（2024）最高法民申7号，一审案号（2021）沪0115执12号")
+        self.assertEqual(
+            [(x.case_number.court_code, x.case_number.stage) for x in anchors if hasattr(x, "case_number")],
+            [("1101", TrialStage.FIRST), ("00", TrialStage.RETRIAL), ("310115", TrialStage.FIRST)],
+        )
+        # the stage is kept apart from the version, which is the revision of a law.
+        self.assertEqual(
+            [(x.value, x.stage, x.version) for x in anchors][-2:],
+            [("一审", TrialStage.FIRST, None), ("（2021）沪0115执12号", TrialStage.FIRST, None)],
+        )
+
+    def test_chain(self):
+        content = "本院（2023）京民终123号判决。原审(2022)京01民初45号。再审〔2024〕最高法民申7号，维持（2023）京民终123号。"
+        anchors = [x for x in self.extractor.extract(content) if hasattr(x, "case_number")]
+        second, first, retrial, second_again = anchors
+        self.assertIsNone(first.parent)
+        self.assertIs(second.parent, first)
+        self.assertIs(retrial.parent, second)
+        self.assertIs(second_again.parent, first)
+
+    def test_same_stage_not_linked(self):
+        content = "（2022）京01民初45号、（2022）京01民初46号，二审（2023）京民终123号。"
+        first, sibling, second = [x for x in self.extractor.extract(content) if hasattr(x, "case_number")]
+        self.assertIsNone(first.parent)
+        self.assertIsNone(sibling.parent)
+        self.assertIs(second.parent, sibling)
+
+    def test_unknown_court(self):
+        self.assertEqual(self.extractor.extract("（2023）某01民终123号"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()